@@ -6,7 +6,8 @@ default_maze = os.path.join("maps", "default", "simple.json")
 
 CLOSED_PROB = 0.05
 
-possible_players = ["d"] + list(map(str, range(1, 10)))
+# Optional JSON file registering more players, see player_registry.load_registry_file
+player_registry_file = "players.json"
 
 # Directions for the maze
 WAIT = -1
@@ -24,4 +25,19 @@ timeout = 60 * 10
 
 CELL_SIZE = 8
 
-# two doors visible, drone radius
\ No newline at end of file
+# two doors visible, drone radius
+
+# Environment variable set in processes where players must not start processes of their own, e.g. tournament workers
+# which already run one game per CPU
+serial_players_env = "TIMING_MAZE_SERIAL_PLAYERS"
+
+# Turns up to which number_theory tabulates divisors, later turns are factored on demand
+divisor_horizon = 10000
+
+# Longest period over which number_theory.ExpectedWaitTable tabulates the waits of a pair of candidate sets, and the
+# number of tabulated values it keeps
+expected_wait_max_period = 5040
+expected_wait_max_size = 1 << 21
+
+# Version of the random maze generator, see maze.maze_generators
+generator_version = 2
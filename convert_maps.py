@@ -0,0 +1,37 @@
+import argparse
+import glob
+import os
+
+from maze import binary_maze_extension, load_maze, save_maze
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert maps between the JSON and the binary ({}) format".format(
+        binary_maze_extension))
+    parser.add_argument("mazes", nargs="*", default=[os.path.join("maps", "**", "*.json")],
+                        help="Map files or glob patterns to convert")
+    parser.add_argument("--to", choices=["binary", "json"], default="binary", help="Format to convert to")
+    parser.add_argument("--output_dir", "-o", help="Directory to write the converted maps to, "
+                                                   "next to the original maps if not given")
+    args = parser.parse_args()
+
+    extension = binary_maze_extension if args.to == "binary" else ".json"
+    paths = []
+    for pattern in args.mazes:
+        paths += sorted(glob.glob(pattern, recursive=True))
+
+    for path in paths:
+        if os.path.splitext(path)[1] == extension:
+            continue
+        output_path = os.path.splitext(path)[0] + extension
+        if args.output_dir:
+            # Keep the layout of the maps below the working directory, flatten the ones outside of it
+            relative_path = os.path.relpath(output_path)
+            if relative_path.startswith(os.pardir):
+                relative_path = os.path.basename(output_path)
+            output_path = os.path.join(args.output_dir, relative_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        map_frequencies, start_pos, end_pos = load_maze(path)
+        save_maze(output_path, map_frequencies, start_pos, end_pos)
+        print("{} ({} bytes) -> {} ({} bytes)".format(path, os.path.getsize(path), output_path,
+                                                      os.path.getsize(output_path)))
@@ -0,0 +1,64 @@
+import numpy as np
+
+import constants
+
+
+def get_crossing_periods(map_frequencies):
+    """(map_dim, map_dim, 4) array of the period with which each door of a cell can be crossed, 0 if never
+
+        A door can be crossed on the turns its door and the adjacent door of the neighbouring cell are both open,
+        which are the multiples of the LCM of their frequencies.
+    """
+    map_frequencies = np.asarray(map_frequencies, dtype=np.int64)
+    neighbour_frequencies = np.zeros_like(map_frequencies)
+    neighbour_frequencies[1:, :, constants.LEFT] = map_frequencies[:-1, :, constants.RIGHT]
+    neighbour_frequencies[:, 1:, constants.UP] = map_frequencies[:, :-1, constants.DOWN]
+    neighbour_frequencies[:-1, :, constants.RIGHT] = map_frequencies[1:, :, constants.LEFT]
+    neighbour_frequencies[:, :-1, constants.DOWN] = map_frequencies[:, 1:, constants.UP]
+    return np.lcm(map_frequencies, neighbour_frequencies)
+
+
+class DoorSchedule:
+    # Direction vectors, indexed by door type
+    dRow = [-1, 0, 1, 0]
+    dCol = [0, -1, 0, 1]
+
+    # The door on the neighbouring cell that faces each door type
+    opposite_door = [constants.RIGHT, constants.DOWN, constants.LEFT, constants.UP]
+
+    def __init__(self, map_frequencies):
+        """Answers whether a door is open on a given turn directly from the door frequencies
+
+            A door with frequency n > 0 is open on turn t exactly when t % n == 0, a door with
+            frequency n = 0 never opens. No per-turn state has to be kept, so querying any turn
+            (past or future) costs the same.
+
+            Args:
+                map_frequencies (np.ndarray): (map_dim, map_dim, 4) array of door frequencies
+        """
+        self.map_frequencies = map_frequencies
+        self.map_dim = map_frequencies.shape[0]
+
+        # Doors that never open get a period of 1 and are masked out with can_open
+        self.can_open = map_frequencies > 0
+        self.periods = np.where(self.can_open, map_frequencies, 1).astype(int)
+
+    def is_open(self, row, col, door_type, turn):
+        return self.can_open[row, col, door_type] and turn % self.periods[row, col, door_type] == 0
+
+    def open_doors(self, rows, cols, door_types, turn):
+        # Vectorized is_open for arrays of door coordinates
+        return self.can_open[rows, cols, door_types] & (turn % self.periods[rows, cols, door_types] == 0)
+
+    def can_cross(self, row, col, door_type, turn):
+        # A move is possible only if it stays on the grid and both doors of the shared wall are open
+        adj_row = row + self.dRow[door_type]
+        adj_col = col + self.dCol[door_type]
+        if adj_row < 0 or adj_col < 0 or adj_row >= self.map_dim or adj_col >= self.map_dim:
+            return False
+        return (self.is_open(row, col, door_type, turn)
+                and self.is_open(adj_row, adj_col, self.opposite_door[door_type], turn))
+
+    def open_mask(self, turn):
+        # Boolean (map_dim, map_dim, 4) array of the doors open on the given turn
+        return self.can_open & (turn % self.periods == 0)
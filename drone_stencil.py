@@ -0,0 +1,119 @@
+from collections import deque as queue
+from functools import lru_cache
+
+import numpy as np
+
+import constants
+from timing_maze_state import percept_dtype
+
+
+class DroneStencil:
+    # Direction vectors, same order as the door types
+    dRow = [-1, 0, 1, 0]
+    dCol = [0, -1, 0, 1]
+
+    def __init__(self, radius):
+        """Offsets and door types visible to a drone of the given radius
+
+            A door is visible if its centre or one of its two ends lies within the radius of the
+            centre of the drone's cell, so visibility only depends on the offset of the door's cell
+            from the drone. The entries are stored in the order the engine's breadth first search
+            from the drone used to report them.
+
+            Args:
+                radius (int): the radius of the drone
+        """
+        self.radius = radius
+        # No door of a cell further than radius + 1/2 along either axis can be visible
+        self.extent = int(radius) + 1
+
+        offsets = np.arange(-self.extent, self.extent + 1)
+        dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+
+        # Coordinates of the door centres and ends relative to the centre of the drone's cell
+        ends = (-0.5, 0.0, 0.5)
+        door_distance = np.empty(dx.shape + (4,))
+        door_distance[..., constants.LEFT] = np.min(
+            [distance(dx - 0.5, dy + end) for end in ends], axis=0)
+        door_distance[..., constants.RIGHT] = np.min(
+            [distance(dx + 0.5, dy + end) for end in ends], axis=0)
+        door_distance[..., constants.UP] = np.min(
+            [distance(dx + end, dy - 0.5) for end in ends], axis=0)
+        door_distance[..., constants.DOWN] = np.min(
+            [distance(dx + end, dy + 0.5) for end in ends], axis=0)
+        visible_doors = door_distance <= radius
+
+        # Dense window of the cells with at least one visible door, indexed by offset + extent
+        self.visible_cells = visible_doors.any(axis=2)
+
+        # Replay the breadth first search on the offsets once so the entry order matches it
+        cells = []
+        vis = np.zeros_like(self.visible_cells)
+        q = queue()
+        q.append((self.extent, self.extent))
+        vis[self.extent][self.extent] = True
+        window = 2 * self.extent + 1
+        while len(q) > 0:
+            row, col = q.popleft()
+            if not self.visible_cells[row][col]:
+                continue
+            cells.append((row, col))
+            for i in range(4):
+                adj_x = row + self.dRow[i]
+                adj_y = col + self.dCol[i]
+                if 0 <= adj_x < window and 0 <= adj_y < window and not vis[adj_x][adj_y]:
+                    q.append((adj_x, adj_y))
+                    vis[adj_x][adj_y] = True
+
+        cells = np.array(cells, dtype=int).reshape(-1, 2)
+        cell_doors = visible_doors[cells[:, 0], cells[:, 1]]
+        entry_cell, self.door_type = np.nonzero(cell_doors)
+        self.dx = cells[entry_cell, 0] - self.extent
+        self.dy = cells[entry_cell, 1] - self.extent
+
+        self.entries = np.zeros(len(self.dx), dtype=percept_dtype)
+        self.entries["dx"] = self.dx
+        self.entries["dy"] = self.dy
+        self.entries["door"] = self.door_type
+
+    def is_cell_visible(self, dx, dy):
+        if abs(dx) > self.extent or abs(dy) > self.extent:
+            return False
+        return bool(self.visible_cells[dx + self.extent][dy + self.extent])
+
+    def get_visual(self, cur_pos, door_schedule, turn):
+        """Door states visible from cur_pos on the given turn
+
+            Clipping the stencil to the map keeps the remaining entries in breadth first search order,
+            since every cell between the drone and a visible cell on the map is itself on the map.
+
+            Returns:
+                np.ndarray: structured array of percept_dtype with the offset, type and state of every visible door
+        """
+        rows = self.dx + cur_pos[0]
+        cols = self.dy + cur_pos[1]
+        on_map = (rows >= 0) & (rows < door_schedule.map_dim) & (cols >= 0) & (cols < door_schedule.map_dim)
+        rows = rows[on_map]
+        cols = cols[on_map]
+        door_type = self.door_type[on_map]
+
+        state = np.where(door_schedule.open_doors(rows, cols, door_type, turn), constants.OPEN, constants.CLOSED)
+        boundary = (((rows == 0) & (door_type == constants.LEFT))
+                    | ((rows == door_schedule.map_dim - 1) & (door_type == constants.RIGHT))
+                    | ((cols == 0) & (door_type == constants.UP))
+                    | ((cols == door_schedule.map_dim - 1) & (door_type == constants.DOWN)))
+        state[boundary] = constants.BOUNDARY
+
+        percept = self.entries[on_map]
+        percept["state"] = state
+        return percept
+
+
+def distance(x, y):
+    return np.sqrt(x ** 2 + y ** 2)
+
+
+@lru_cache(maxsize=None)
+def get_drone_stencil(radius):
+    # The stencil only depends on the radius, so build it once per radius and share it
+    return DroneStencil(radius)
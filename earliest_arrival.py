@@ -0,0 +1,202 @@
+import heapq
+import math
+
+import numpy as np
+
+import constants
+from door_schedule import DoorSchedule, get_crossing_periods
+
+INF = math.inf
+
+
+class EarliestArrivalPlanner:
+    # Direction vectors, indexed by door type
+    dRow = DoorSchedule.dRow
+    dCol = DoorSchedule.dCol
+    opposite_door = DoorSchedule.opposite_door
+
+    def __init__(self, map_frequencies):
+        """Earliest arrival turns to a goal with periodic doors, kept up to date between turns
+
+            A door between two cells can be crossed on the turns both its doors are open, the multiples of
+            the LCM of their frequencies. This is Lifelong Planning A* (the forward search D* Lite is built on)
+            over arrival turns instead of distances: waiting is allowed, so arriving later never helps and the
+            arrival turn through a door is a non-decreasing function of the turn the cell was reached on.
+            Between calls to plan, only the cells whose arrival turn is affected by changed door frequencies
+            or by a new start are searched again.
+
+            Args:
+                map_frequencies (np.ndarray): (rows, cols, 4) door frequencies in the player's coordinates, with 0
+                    for doors that never open. Doors whose frequency is unknown can be given an estimate.
+        """
+        self.frequencies = np.array(map_frequencies, dtype=int)
+        self.rows, self.cols = self.frequencies.shape[:2]
+        self.periods = get_crossing_periods(self.frequencies).tolist()
+
+        self.start = None
+        self.start_turn = None
+        self.goal = None
+        self.path = []
+        self.changed = True
+
+        # Arrival turn of the cells reached by the search, and the one-step lookahead values of LPA*
+        self.g = {}
+        self.rhs = {}
+        self.queue = []
+        self.queued = {}
+
+    def set_frequencies(self, rows, cols, door_types, frequencies):
+        """Change the frequencies of some doors, e.g. once they have been observed"""
+        rows, cols, door_types = np.atleast_1d(rows), np.atleast_1d(cols), np.atleast_1d(door_types)
+        frequencies = np.atleast_1d(frequencies)
+        changed = self.frequencies[rows, cols, door_types] != frequencies
+        self.frequencies[rows[changed], cols[changed], door_types[changed]] = frequencies[changed]
+
+        for row, col, door_type in zip(rows[changed].tolist(), cols[changed].tolist(), door_types[changed].tolist()):
+            adj_row, adj_col = row + self.dRow[door_type], col + self.dCol[door_type]
+            if not (0 <= adj_row < self.rows and 0 <= adj_col < self.cols):
+                continue
+            opposite = self.opposite_door[door_type]
+            period = math.lcm(int(self.frequencies[row, col, door_type]),
+                              int(self.frequencies[adj_row, adj_col, opposite]))
+            if period == self.periods[row][col][door_type]:
+                continue
+            self.periods[row][col][door_type] = period
+            self.periods[adj_row][adj_col][opposite] = period
+            self.changed = True
+            if self.goal is not None:
+                self.update_cell((row, col))
+                self.update_cell((adj_row, adj_col))
+
+    def heuristic(self, cell):
+        # Every move takes at least a turn, so the Manhattan distance never overestimates
+        return abs(cell[0] - self.goal[0]) + abs(cell[1] - self.goal[1])
+
+    def get_key(self, cell):
+        turn = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return turn + self.heuristic(cell), turn
+
+    def get_neighbours(self, cell):
+        # Cells sharing a door that can be crossed with cell, with the door's crossing period
+        row, col = cell
+        for door_type, period in enumerate(self.periods[row][col]):
+            if period > 0:
+                adj_row, adj_col = row + self.dRow[door_type], col + self.dCol[door_type]
+                if 0 <= adj_row < self.rows and 0 <= adj_col < self.cols:
+                    yield (adj_row, adj_col), door_type, period
+
+    def update_cell(self, cell):
+        if cell != self.start:
+            rhs = INF
+            for neighbour, _, period in self.get_neighbours(cell):
+                turn = self.g.get(neighbour, INF)
+                if turn < INF:
+                    # Cross on the first turn after arriving on which both doors are open
+                    rhs = min(rhs, (turn // period + 1) * period)
+            self.rhs[cell] = rhs
+
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            key = self.get_key(cell)
+            self.queued[cell] = key
+            heapq.heappush(self.queue, (key, cell))
+        else:
+            self.queued.pop(cell, None)
+
+    def get_top_key(self):
+        # Drop the queue entries replaced by a later update of their cell
+        while self.queue and self.queued.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else (INF, INF)
+
+    def compute_arrivals(self):
+        goal = self.goal
+        while (self.get_top_key() < self.get_key(goal)
+               or self.rhs.get(goal, INF) != self.g.get(goal, INF)):
+            if not self.queue:
+                break
+            _, cell = heapq.heappop(self.queue)
+            del self.queued[cell]
+            if self.g.get(cell, INF) > self.rhs.get(cell, INF):
+                self.g[cell] = self.rhs[cell]
+            else:
+                self.g[cell] = INF
+                self.update_cell(cell)
+            for neighbour, _, _ in self.get_neighbours(cell):
+                self.update_cell(neighbour)
+
+    def reset(self, start, turn, goal):
+        self.g = {}
+        self.rhs = {start: turn}
+        self.queue = []
+        self.queued = {}
+        self.start = start
+        self.start_turn = turn
+        self.goal = goal
+        self.update_cell(start)
+
+    def plan(self, start, turn, goal):
+        """Fastest way from start to goal, leaving start on turn + 1 at the earliest
+
+            Args:
+                start (Tuple[int, int]): current cell
+                turn (int): number of turns played, the first action is played on turn + 1
+                goal (Tuple[int, int]): cell to reach
+            Returns:
+                List[int]: action of every turn until the goal is reached, None if it cannot be reached
+        """
+        start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+
+        # Still on the last plan and nothing changed: the rest of it is still the fastest way
+        if not self.changed and goal == self.goal:
+            for position, (cell, arrival_turn) in enumerate(self.path[:-1]):
+                if cell == start and arrival_turn <= turn < self.path[position + 1][1]:
+                    return self.get_actions([(start, turn)] + self.path[position + 1:])
+
+        if goal != self.goal:
+            # The heuristic depends on the goal, so the queue cannot be reused
+            self.reset(start, turn, goal)
+        elif start != self.start or turn != self.start_turn:
+            previous_start = self.start
+            self.start = start
+            self.start_turn = turn
+            self.rhs[start] = turn
+            self.update_cell(start)
+            self.update_cell(previous_start)
+
+        self.compute_arrivals()
+        self.changed = False
+
+        if self.g.get(goal, INF) == INF:
+            self.path = []
+            return None
+        self.path = self.get_path()
+        return self.get_actions(self.path)
+
+    def get_path(self):
+        # (cell, arrival turn) from the start to the goal, following the arrival turns back from the goal
+        cell = self.goal
+        path = [(cell, self.g[cell])]
+        while cell != self.start:
+            turn = self.g[cell]
+            for neighbour, _, period in self.get_neighbours(cell):
+                neighbour_turn = self.g.get(neighbour, INF)
+                if (neighbour_turn < turn and neighbour_turn == self.rhs.get(neighbour, INF)
+                        and (neighbour_turn // period + 1) * period == turn):
+                    cell = neighbour
+                    break
+            path.append((cell, self.g[cell]))
+        path.reverse()
+        return path
+
+    def get_actions(self, path):
+        actions = []
+        for (cell, turn), (next_cell, next_turn) in zip(path, path[1:]):
+            actions += [constants.WAIT] * (next_turn - turn - 1)
+            for door_type in range(4):
+                if (cell[0] + self.dRow[door_type], cell[1] + self.dCol[door_type]) == next_cell:
+                    actions.append(door_type)
+        return actions
+
+    def get_arrival_turn(self, cell):
+        # Earliest arrival turn of a cell found by the last search, inf if it was not reached
+        return self.g.get(tuple(cell), INF)
@@ -0,0 +1,56 @@
+from typing import NamedTuple
+
+import numpy as np
+
+import constants
+from door_schedule import DoorSchedule
+
+
+class ForwardModel(NamedTuple):
+    """Immutable state of a game as a player knows it, for lookahead and rollouts
+
+        Moves follow the engine's rules (TimingMazeGame.check_and_apply_move), applied to the door frequencies the
+        player knows. Doors whose frequency is unknown can be given a guess, or 0 to treat them as never open.
+
+        Attributes:
+            door_schedule (DoorSchedule): known door frequencies, in the player's own coordinates
+            x (int): current row of the drone
+            y (int): current column of the drone
+            turn (int): turn on which the next action is played, the current turn inside Player.move
+    """
+    door_schedule: DoorSchedule
+    x: int
+    y: int
+    turn: int
+
+    @classmethod
+    def from_frequencies(cls, map_frequencies, x, y, turn):
+        # The schedule is built from a copy of the frequencies, so later changes to them do not affect the model
+        return cls(DoorSchedule(np.array(map_frequencies)), int(x), int(y), int(turn))
+
+    def clone(self):
+        # Models are never modified, so a clone can share everything with the original
+        return self
+
+    def can_move(self, action):
+        if action == constants.WAIT:
+            return True
+        return self.door_schedule.can_cross(self.x, self.y, action, self.turn)
+
+    def legal_actions(self):
+        return [action for action in (constants.WAIT, constants.LEFT, constants.UP, constants.RIGHT, constants.DOWN)
+                if self.can_move(action)]
+
+    def step(self, action):
+        """Play one action, a move that cannot be made leaves the drone where it is like in the engine
+
+            Returns:
+                ForwardModel: the state after the action, on the next turn
+        """
+        if action != constants.WAIT and self.door_schedule.can_cross(self.x, self.y, action, self.turn):
+            return self._replace(x=self.x + DoorSchedule.dRow[action], y=self.y + DoorSchedule.dCol[action],
+                                 turn=self.turn + 1)
+        return self._replace(turn=self.turn + 1)
+
+    def is_at(self, x, y):
+        return self.x == x and self.y == y
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+import numpy as np
+
+import constants
+
+# Number of set bits of every byte, to count candidates without looping over them
+byte_popcount = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+@lru_cache(maxsize=None)
+def get_frequency_masks(max_door_frequency):
+    """Bitmask of every single frequency, bit f for frequency f and bit 0 for a door that never opens
+
+        Returns:
+            np.ndarray: (max_door_frequency + 1, n_words) uint64 array, row f is the mask of frequency f
+    """
+    n_words = (max_door_frequency + 1 + 63) // 64
+    masks = np.zeros((max_door_frequency + 1, n_words), dtype=np.uint64)
+    for frequency in range(max_door_frequency + 1):
+        masks[frequency, frequency // 64] = np.uint64(1) << np.uint64(frequency % 64)
+    return masks
+
+
+def pack_mask(bits):
+    # Bitmask words of a boolean array indexed by frequency
+    n_words = (len(bits) + 63) // 64
+    padded = np.zeros(n_words * 64, dtype=bool)
+    padded[:len(bits)] = bits
+    return np.packbits(padded, bitorder="little").view("<u8").astype(np.uint64)
+
+
+class FrequencyBeliefGrid:
+    def __init__(self, max_door_frequency, shape=(constants.map_dim, constants.map_dim)):
+        """Candidate frequencies of every door, as one bitmask per door
+
+            Bit f of a door's mask is set while frequency f (1 to max_door_frequency) is still possible for it, and
+            bit 0 while it may be a door that never opens. Every observation of a door clears the candidates it
+            rules out, so inference costs the same for every observed door however long the game is.
+
+            Args:
+                max_door_frequency (int): the maximum door frequency of the game
+                shape (Tuple[int, int]): size of the grid, in the player's own coordinates
+        """
+        self.max_door_frequency = max_door_frequency
+        self.frequencies = np.arange(max_door_frequency + 1)
+        self.frequency_masks = get_frequency_masks(max_door_frequency)
+        self.n_words = self.frequency_masks.shape[1]
+
+        self.all_candidates = pack_mask(np.ones(max_door_frequency + 1, dtype=bool))
+        self.masks = np.empty(tuple(shape) + (4, self.n_words), dtype=np.uint64)
+        self.masks[...] = self.all_candidates
+
+    def get_open_mask(self, turn):
+        # Frequencies for which a door is open on the given turn: the divisors of the turn
+        return pack_mask((self.frequencies > 0) & (turn % np.maximum(self.frequencies, 1) == 0))
+
+    def observe(self, rows, cols, door_types, states, turn):
+        """Apply the door states seen on a turn, as one mask operation for all of them
+
+            Args:
+                rows, cols, door_types, states (np.ndarray): observed doors and their OPEN, CLOSED or BOUNDARY state
+                turn (int): turn the doors were seen on
+        """
+        open_mask = self.get_open_mask(turn)
+        closed_mask = self.all_candidates & ~open_mask
+        boundary_mask = self.frequency_masks[0]
+        states = np.asarray(states)[:, None]
+        observed = np.where(states == constants.OPEN, open_mask,
+                            np.where(states == constants.CLOSED, closed_mask, boundary_mask))
+        self.masks[rows, cols, door_types] &= observed
+
+    def observe_percept(self, percept, cur_x, cur_y, turn):
+        """Apply a player's percept
+
+            Args:
+                percept (TimingMazeState): the percept given to Player.move
+                cur_x, cur_y (int): position of the drone in the grid's coordinates
+                turn (int): the current turn
+        """
+        doors = percept.maze_state_array
+        self.observe(doors["dx"] + cur_x, doors["dy"] + cur_y, doors["door"], doors["state"], turn)
+
+    def get_mask(self, row, col, door_type):
+        return self.masks[row, col, door_type]
+
+    def count_candidates(self, row=None, col=None, door_type=None):
+        # Number of candidates of a door, or of every door if no door is given
+        masks = self.masks if row is None else self.masks[row, col, door_type]
+        counts = byte_popcount[masks.view(np.uint8)].reshape(masks.shape[:-1] + (-1,)).sum(axis=-1)
+        return int(counts) if row is not None else counts
+
+    def get_certain_frequency(self, row, col, door_type):
+        """Frequency of a door if only one is left, 0 for a door that never opens, None while it is uncertain"""
+        mask = self.masks[row, col, door_type]
+        words = np.nonzero(mask)[0]
+        if len(words) != 1:
+            return None
+        word = int(mask[words[0]])
+        if word & (word - 1):
+            return None
+        return int(words[0]) * 64 + word.bit_length() - 1
+
+    def get_certain_frequencies(self):
+        """(rows, cols, 4) array of the frequency of every door whose frequency is known, -1 elsewhere"""
+        counts = self.count_candidates()
+        certain = np.full(counts.shape, -1)
+        known = counts == 1
+        for word in range(self.n_words):
+            masks = self.masks[..., word][known]
+            # The only set bit of a power of two is its base 2 logarithm
+            bits = np.where(masks > 0, np.log2(np.maximum(masks, 1).astype(float)), -1).astype(int)
+            certain[known] = np.where(bits >= 0, word * 64 + bits, certain[known])
+        return certain
+
+    def get_candidates(self, row, col, door_type):
+        # Frequencies still possible for a door, 0 meaning it may never open
+        mask = self.masks[row, col, door_type]
+        return [frequency for frequency in range(self.max_door_frequency + 1)
+                if mask[frequency // 64] >> np.uint64(frequency % 64) & np.uint64(1)]
+
+    def may_be_open(self, row, col, door_type, turn):
+        # Whether some candidate frequency of the door opens it on the given turn
+        return bool((self.masks[row, col, door_type] & self.get_open_mask(turn)).any())
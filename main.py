@@ -1,6 +1,7 @@
 import argparse
+import constants
+from replay import trace_extension
 from timing_maze_game import TimingMazeGame
-import tkinter as tk
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -10,21 +11,42 @@ if __name__ == '__main__':
                         help="radius of the circle visible by the drone ""(min=1, max=150")
     parser.add_argument("--seed", "-s", type=int, default=2, help="Seed used by random number generator")
     parser.add_argument(
-        "--maze", "-mz", help="Use the given map, if no map is given, Generate a maze using the seed provided"
+        "--maze", "-mz", help="Use the given map (.json or binary .tmz), if no map is given, Generate a maze using "
+                              "the seed provided"
     )
+    parser.add_argument("--generator_version", "-gv", type=int, default=constants.generator_version,
+                        help="Version of the random maze generator, a seed always gives the same maze for a version")
+    parser.add_argument("--repair_maze", action="store_true",
+                        help="Connect the islands of a generated maze instead of generating a new one")
     parser.add_argument("--scale", "-sc", default=9, help="Scale")
+    parser.add_argument("--turns", "-T", type=int, default=None,
+                        help="Turns after which the game is stopped if the goal was not reached")
     parser.add_argument("--no_gui", "-ng", action="store_true", help="Disable GUI")
     parser.add_argument("--log_path", default="log", help="Directory path to dump log files, filepath if "
                                                           "disable_logging is false")
     parser.add_argument("--disable_logging", action="store_true", help="Disable Logging, log_path becomes path to file")
     parser.add_argument("--disable_timeout", action="store_true", help="Disable timeouts for player code")
     parser.add_argument("--player", "-p", default="d", help="Specifying player")
+    parser.add_argument("--metrics_path", help="Save per-turn timings, percept size and actions to this .csv or "
+                                               ".parquet file at the end of the game")
+    parser.add_argument("--record_path", help="Save the actions of the game to this replay trace ({}) at the end of "
+                                              "the game".format(trace_extension))
+    parser.add_argument("--replay", dest="replay_path", help="Replay a trace without running the player, the seed, "
+                                                             "parameters and map are taken from the trace")
     args = parser.parse_args()
 
     if args.disable_logging:
         if args.log_path == "log":
             args.log_path = "results.log"
 
-    root = tk.Tk()
-    app = TimingMazeGame(args, root)
+    app = TimingMazeGame(args)
+    if args.no_gui:
+        app.run()
+    else:
+        # Only import tkinter when the GUI is requested, so headless runs work without a display
+        import tkinter as tk
+        from timing_maze_gui import TimingMazeGUI
 
+        root = tk.Tk()
+        gui = TimingMazeGUI(app, root)
+        root.mainloop()
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+import constants
+
+# Binary map layout: a 16 byte little endian header (magic, map_dim, start x, start y, end x, end y, unused)
+# followed by the (map_dim, map_dim, 4) uint8 array of door frequencies in C order
+binary_maze_extension = ".tmz"
+binary_maze_magic = b"TMZ1"
+binary_maze_header = struct.Struct("<4s6H")
+
+
+def load_maze(path):
+    """Load a maze from a JSON map or from a binary map, which is memory-mapped
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: door frequencies, start and end position
+    """
+    if os.path.splitext(path)[1] == binary_maze_extension:
+        return load_binary_maze(path)
+
+    with open(path, "r") as f:
+        maze_obj = json.load(f)
+    return np.array(maze_obj["frequencies"]), np.array(maze_obj["start_pos"]), np.array(maze_obj["end_pos"])
+
+
+def load_binary_maze(path):
+    with open(path, "rb") as f:
+        magic, map_dim, start_x, start_y, end_x, end_y, _ = binary_maze_header.unpack(
+            f.read(binary_maze_header.size))
+    if magic != binary_maze_magic:
+        raise ValueError("{} is not a binary maze".format(path))
+
+    map_frequencies = np.memmap(path, dtype=np.uint8, mode="r", offset=binary_maze_header.size,
+                                shape=(map_dim, map_dim, 4))
+    return map_frequencies, np.array([start_x, start_y]), np.array([end_x, end_y])
+
+
+def save_maze(path, map_frequencies, start_pos, end_pos):
+    # Save in the binary format if path has its extension, in the JSON format otherwise
+    if os.path.splitext(path)[1] == binary_maze_extension:
+        save_binary_maze(path, map_frequencies, start_pos, end_pos)
+        return
+
+    data = {
+        "frequencies": np.asarray(map_frequencies).tolist(),
+        "start_pos": np.asarray(start_pos).tolist(),
+        "end_pos": np.asarray(end_pos).tolist()
+    }
+    with open(path, "w") as json_file:
+        json.dump(data, json_file, indent=4)
+
+
+def save_binary_maze(path, map_frequencies, start_pos, end_pos):
+    map_frequencies = np.asarray(map_frequencies)
+    if map_frequencies.min() < 0 or map_frequencies.max() > np.iinfo(np.uint8).max:
+        raise ValueError("Door frequencies must be between 0 and 255 to be saved in a binary maze")
+
+    with open(path, "wb") as f:
+        f.write(binary_maze_header.pack(binary_maze_magic, map_frequencies.shape[0], int(start_pos[0]),
+                                        int(start_pos[1]), int(end_pos[0]), int(end_pos[1]), 0))
+        f.write(np.ascontiguousarray(map_frequencies, dtype=np.uint8).tobytes())
+
+
+def get_map_hash(map_frequencies, start_pos, end_pos):
+    # Hash of the door frequencies, start and end position, identifying a map wherever it was loaded from
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(map_frequencies, dtype=np.uint8).tobytes())
+    digest.update(np.asarray([*start_pos, *end_pos], dtype="<u2").tobytes())
+    return digest.digest()
+
+
+def validate_maze(map_frequencies, start_pos, end_pos, max_door_frequency):
+    """Check that a maze follows the rules of the game
+
+        Args:
+            map_frequencies (np.ndarray): (map_dim, map_dim, 4) array of door frequencies
+            start_pos (np.ndarray): start cell of the drone
+            end_pos (np.ndarray): goal cell
+            max_door_frequency (int): the maximum frequency of doors
+        Returns:
+            bool: True if the maze is valid
+    """
+    map_dim = constants.map_dim
+
+    # Check the size of the map
+    if map_frequencies.shape != (map_dim, map_dim, 4):
+        print("Error with map size")
+        return False
+
+    # Check that all doors have a frequency between 0 and max_door_frequency
+    if np.any(map_frequencies < 0) or np.any(map_frequencies > max_door_frequency):
+        print("Error with frequency")
+        return False
+
+    # Check that all boundary doors have n=0 in map_frequencies.
+    # Report the first offending door in the same order as a scan along the boundary would.
+    boundary_errors = np.stack([map_frequencies[0, :, constants.LEFT] != 0,
+                                map_frequencies[map_dim-1, :, constants.RIGHT] != 0,
+                                map_frequencies[:, 0, constants.UP] != 0,
+                                map_frequencies[:, map_dim-1, constants.DOWN] != 0], axis=1)
+    if np.any(boundary_errors):
+        first_error = np.flatnonzero(boundary_errors)[0] % 4
+        print(["Error with UP", "Error with DOWN", "Error with LEFT", "Error with RIGHT"][first_error])
+        return False
+
+    # Check that map has a valid start and end position.
+    if start_pos[0] < 0 or start_pos[0] >= map_dim or start_pos[1] < 0 or start_pos[1] >= map_dim:
+        print("Error with start")
+        return False
+
+    if end_pos[0] < 0 or end_pos[0] >= map_dim or end_pos[1] < 0 or end_pos[1] >= map_dim:
+        print("Error with end")
+        return False
+
+    if start_pos[0] == end_pos[0] and start_pos[1] == end_pos[1]:
+        print("Error with start and end")
+        return False
+
+    # Check if all cells are reachable from one-another
+    print("Validating reachability of all cells...")
+    return count_islands(map_frequencies) == 1
+
+
+def get_open_edges(map_frequencies):
+    """Walls that can be crossed at some turn, i.e. both of their doors have n > 0
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (map_dim-1, map_dim) boolean array of the walls between cells
+            (i, j) and (i+1, j), and (map_dim, map_dim-1) boolean array of the walls between cells (i, j)
+            and (i, j+1)
+    """
+    can_open = map_frequencies != 0
+    horizontal = can_open[:-1, :, constants.RIGHT] & can_open[1:, :, constants.LEFT]
+    vertical = can_open[:, :-1, constants.DOWN] & can_open[:, 1:, constants.UP]
+    return horizontal, vertical
+
+
+def label_islands(map_frequencies):
+    """Label the connected components of the undirected graph of cells and crossable walls
+
+        Returns:
+            Tuple[int, np.ndarray]: number of components and (map_dim, map_dim) array of component labels
+    """
+    map_dim = map_frequencies.shape[0]
+    horizontal, vertical = get_open_edges(map_frequencies)
+
+    cell_ids = np.arange(map_dim * map_dim).reshape(map_dim, map_dim)
+    sources = np.concatenate([cell_ids[:-1, :][horizontal], cell_ids[:, :-1][vertical]])
+    targets = np.concatenate([cell_ids[1:, :][horizontal], cell_ids[:, 1:][vertical]])
+    graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)),
+                       shape=(map_dim * map_dim, map_dim * map_dim))
+
+    n_islands, labels = connected_components(graph, directed=False)
+    return n_islands, labels.reshape(map_dim, map_dim)
+
+
+def count_islands(map_frequencies):
+    return label_islands(map_frequencies)[0]
+
+
+def generate_maze(rng, max_door_frequency, version=constants.generator_version, repair=False):
+    """Generate a random valid maze
+
+        A given seed always produces the same maze for a given generator version.
+
+        Args:
+            rng (np.random.Generator): random number generator used only for the maze
+            max_door_frequency (int): the maximum frequency of doors
+            version (int): version of the generator, see maze_generators
+            repair (bool): open walls between the islands of an invalid maze instead of generating a new one
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: door frequencies, start and end position
+    """
+    if version not in maze_generators:
+        raise ValueError("Unknown maze generator version {}".format(version))
+
+    while 1:
+        map_frequencies, start_pos, end_pos = maze_generators[version](rng, max_door_frequency)
+        if validate_maze(map_frequencies, start_pos, end_pos, max_door_frequency):
+            break
+
+        if repair:
+            connect_islands(rng, map_frequencies, max_door_frequency)
+            if validate_maze(map_frequencies, start_pos, end_pos, max_door_frequency):
+                break
+
+        print("Retrying to generate a valid maze...")
+
+    return map_frequencies, start_pos, end_pos
+
+
+def generate_start_and_end(rng):
+    start_pos = np.array([rng.integers(0, constants.map_dim), rng.integers(0, constants.map_dim)])
+    while 1:
+        end_pos = np.array([rng.integers(0, constants.map_dim), rng.integers(0, constants.map_dim)])
+        if end_pos[0] != start_pos[0] and end_pos[1] != start_pos[1]:
+            return start_pos, end_pos
+
+
+def close_boundary_doors(map_frequencies):
+    # Assign n=0 to all boundary doors
+    map_frequencies[0, :, constants.LEFT] = 0
+    map_frequencies[constants.map_dim-1, :, constants.RIGHT] = 0
+    map_frequencies[:, 0, constants.UP] = 0
+    map_frequencies[:, constants.map_dim-1, constants.DOWN] = 0
+
+
+def generate_maze_v1(rng, max_door_frequency):
+    # Original generator, draws every door one at a time. Frequencies are between 1 and
+    # max_door_frequency - 1, kept as is so that seeds keep producing the same mazes.
+    start_pos, end_pos = generate_start_and_end(rng)
+
+    map_frequencies = np.zeros((constants.map_dim, constants.map_dim, 4), dtype=int)
+    for i in range(constants.map_dim):
+        for j in range(constants.map_dim):
+            for k in range(4):
+                if rng.random() < constants.CLOSED_PROB:
+                    map_frequencies[i][j][k] = 0
+                else:
+                    map_frequencies[i][j][k] = rng.integers(1, max_door_frequency)
+
+    close_boundary_doors(map_frequencies)
+    return map_frequencies, start_pos, end_pos
+
+
+def generate_maze_v2(rng, max_door_frequency):
+    # Draws all doors in a single batch. A door is closed with probability CLOSED_PROB,
+    # otherwise its frequency is uniform between 1 and max_door_frequency.
+    start_pos, end_pos = generate_start_and_end(rng)
+
+    u = rng.random((constants.map_dim, constants.map_dim, 4))
+    open_u = (u - constants.CLOSED_PROB) / (1 - constants.CLOSED_PROB)
+    frequencies = np.minimum(1 + (open_u * max_door_frequency).astype(int), max_door_frequency)
+    map_frequencies = np.where(u < constants.CLOSED_PROB, 0, frequencies)
+
+    close_boundary_doors(map_frequencies)
+    return map_frequencies, start_pos, end_pos
+
+
+maze_generators = {
+    1: generate_maze_v1,
+    2: generate_maze_v2,
+}
+
+
+def connect_islands(rng, map_frequencies, max_door_frequency):
+    """Open walls between islands, in place, until every cell is reachable
+
+        Walls between different islands are visited in a random order and opened when they join two
+        islands that are not connected yet, so exactly n_islands - 1 walls are opened.
+    """
+    n_islands, labels = label_islands(map_frequencies)
+    if n_islands == 1:
+        return
+
+    # Interior walls (cell, neighbour, door of the cell) whose two cells lie on different islands
+    rows, cols = np.nonzero(labels[:-1, :] != labels[1:, :])
+    walls = [(row, col, constants.RIGHT) for row, col in zip(rows.tolist(), cols.tolist())]
+    rows, cols = np.nonzero(labels[:, :-1] != labels[:, 1:])
+    walls += [(row, col, constants.DOWN) for row, col in zip(rows.tolist(), cols.tolist())]
+
+    parent = list(range(n_islands))
+
+    def find(island):
+        while parent[island] != island:
+            parent[island] = parent[parent[island]]
+            island = parent[island]
+        return island
+
+    new_frequencies = rng.integers(1, max_door_frequency, size=(len(walls), 2), endpoint=True)
+    for index in rng.permutation(len(walls)):
+        row, col, door_type = walls[index]
+        adj_row, adj_col, adj_door_type = ((row + 1, col, constants.LEFT) if door_type == constants.RIGHT
+                                           else (row, col + 1, constants.UP))
+        a, b = find(labels[row][col]), find(labels[adj_row][adj_col])
+        if a == b:
+            continue
+        parent[a] = b
+        if map_frequencies[row][col][door_type] == 0:
+            map_frequencies[row][col][door_type] = new_frequencies[index][0]
+        if map_frequencies[adj_row][adj_col][adj_door_type] == 0:
+            map_frequencies[adj_row][adj_col][adj_door_type] = new_frequencies[index][1]
+        n_islands -= 1
+        if n_islands == 1:
+            return
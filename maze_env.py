@@ -0,0 +1,212 @@
+import numpy as np
+
+import constants
+from drone_stencil import get_drone_stencil
+from door_schedule import DoorSchedule
+from maze import generate_maze, load_maze, validate_maze
+from timing_maze_state import TimingMazeState
+
+
+class TimingMazeEnv:
+    # Direction vectors, indexed by door type
+    dRow = np.array([-1, 0, 1, 0])
+    dCol = np.array([0, -1, 0, 1])
+
+    def __init__(self, n_envs, radius=15, max_door_frequency=5, max_turns=None,
+                 generator_version=constants.generator_version, repair_maze=False):
+        """Simulates n_envs independent games in lockstep, without players, logging or GUI
+
+            The frequencies, positions and turn counters of all games are stacked in arrays and every step moves
+            all of them at once. Games that are over ignore their actions until the next reset.
+
+            Args:
+                n_envs (int): number of games
+                radius (int): radius of the drone
+                max_door_frequency (int): maximum door frequency of the generated mazes
+                max_turns (int): turns after which a game is over, None to disable
+                generator_version (int): version of the random maze generator
+                repair_maze (bool): connect the islands of generated mazes instead of generating new ones
+        """
+        self.n_envs = n_envs
+        self.radius = radius
+        self.max_door_frequency = max_door_frequency
+        self.max_turns = max_turns
+        self.generator_version = generator_version
+        self.repair_maze = repair_maze
+        self.stencil = get_drone_stencil(radius)
+        self.window_offset = self.stencil.extent
+
+        # The maps are padded with window_offset cells on every side, so that the stencil can be gathered at any
+        # position without bounds checks. closed_states holds the state each door shows when it is not open:
+        # CLOSED on the map, BOUNDARY for the doors on the edge of the map and 0 in the padding.
+        e = self.window_offset
+        padded_dim = constants.map_dim + 2 * e
+        self.padded_frequencies = np.zeros((n_envs, padded_dim, padded_dim, 4), dtype=np.uint8)
+        self.closed_states = np.zeros((n_envs, padded_dim, padded_dim, 4), dtype=np.int8)
+        self.closed_states[:, e:-e, e:-e, :] = constants.CLOSED
+        self.closed_states[:, e, e:-e, constants.LEFT] = constants.BOUNDARY
+        self.closed_states[:, -e - 1, e:-e, constants.RIGHT] = constants.BOUNDARY
+        self.closed_states[:, e:-e, e, constants.UP] = constants.BOUNDARY
+        self.closed_states[:, e:-e, -e - 1, constants.DOWN] = constants.BOUNDARY
+        self.map_frequencies = self.padded_frequencies[:, e:-e, e:-e, :]
+
+        # Offsets of the visible doors and of their entries in door_window, in the flattened arrays
+        self.stencil_index = (self.stencil.dx * padded_dim + self.stencil.dy) * 4 + self.stencil.door_type
+        window_size = 2 * e + 1
+        self.window_index = (((self.stencil.dx + e) * window_size + self.stencil.dy + e) * 4
+                             + self.stencil.door_type)
+
+        self.start_pos = np.zeros((n_envs, 2), dtype=int)
+        self.end_pos = np.zeros((n_envs, 2), dtype=int)
+        self.cur_pos = np.zeros((n_envs, 2), dtype=int)
+        self.turns = np.zeros(n_envs, dtype=int)
+        self.valid_moves = np.zeros(n_envs, dtype=int)
+        self.goal_reached = np.zeros(n_envs, dtype=bool)
+        self.done = np.ones(n_envs, dtype=bool)
+
+        # Door states of the last percept in stencil order, 0 for doors off the map, kept for get_percept
+        self.door_states = None
+
+        # Loaded and validated maps, by path
+        self.maze_cache = {}
+
+    def load_maze(self, path):
+        if path not in self.maze_cache:
+            map_frequencies, start_pos, end_pos = load_maze(path)
+            if not validate_maze(map_frequencies, start_pos, end_pos, self.max_door_frequency):
+                raise ValueError("Invalid map {}".format(path))
+            self.maze_cache[path] = map_frequencies, start_pos, end_pos
+        return self.maze_cache[path]
+
+    def reset(self, seed=None, maze=None):
+        """Start a new game in every environment
+
+            Args:
+                seed (int or Sequence[int]): seeds of the generated mazes, an int gives seed, seed + 1, ... to
+                    the environments
+                maze (str or Sequence[str]): map file for every environment, or one for all of them. Environments
+                    without a map get a maze generated from their seed.
+            Returns:
+                dict: batched percept, see get_observation
+        """
+        if seed is None or np.isscalar(seed):
+            seeds = [None if seed is None else seed + i for i in range(self.n_envs)]
+        else:
+            seeds = list(seed)
+        mazes = [maze] * self.n_envs if maze is None or isinstance(maze, str) else list(maze)
+        if len(seeds) != self.n_envs or len(mazes) != self.n_envs:
+            raise ValueError("Expected a seed and a maze for each of the {} environments".format(self.n_envs))
+
+        for i in range(self.n_envs):
+            if mazes[i]:
+                map_frequencies, start_pos, end_pos = self.load_maze(mazes[i])
+            else:
+                map_frequencies, start_pos, end_pos = generate_maze(
+                    np.random.default_rng(seeds[i]), self.max_door_frequency, self.generator_version,
+                    self.repair_maze)
+            if np.max(map_frequencies) > np.iinfo(np.uint8).max:
+                raise ValueError("Door frequencies must be between 0 and 255")
+            self.map_frequencies[i] = map_frequencies
+            self.start_pos[i] = start_pos
+            self.end_pos[i] = end_pos
+
+        self.cur_pos[:] = self.start_pos
+        self.turns[:] = 0
+        self.valid_moves[:] = 0
+        self.goal_reached[:] = False
+        self.done[:] = False
+        return self.get_observation()
+
+    def is_open(self, envs, rows, cols, door_types, turns):
+        # Vectorized DoorSchedule.is_open over environments
+        frequencies = self.map_frequencies[envs, rows, cols, door_types].astype(int)
+        return (frequencies > 0) & (turns % np.maximum(frequencies, 1) == 0)
+
+    def step(self, actions):
+        """Play one turn in every game that is not over
+
+            Args:
+                actions (Sequence[int]): action of every environment, WAIT or a door type. Other values are
+                    invalid moves, which cost a turn like in the engine.
+            Returns:
+                Tuple[dict, np.ndarray, np.ndarray, dict]: batched percept, reward (-1 per turn played), whether
+                    each game is over, and info with the turns, valid moves and goal_reached of every game
+        """
+        actions = np.asarray(actions, dtype=int)
+        active = ~self.done
+        self.turns[active] += 1
+
+        # Moves are checked like DoorSchedule.can_cross, on the turn they are made
+        moving = active & (actions >= 0) & (actions <= 3)
+        envs = np.nonzero(moving)[0]
+        door_types = actions[envs]
+        rows, cols = self.cur_pos[envs, 0], self.cur_pos[envs, 1]
+        adj_rows, adj_cols = rows + self.dRow[door_types], cols + self.dCol[door_types]
+        on_map = (adj_rows >= 0) & (adj_rows < constants.map_dim) & (adj_cols >= 0) & (adj_cols < constants.map_dim)
+        envs, door_types = envs[on_map], door_types[on_map]
+        rows, cols, adj_rows, adj_cols = rows[on_map], cols[on_map], adj_rows[on_map], adj_cols[on_map]
+        turns = self.turns[envs]
+        can_cross = (self.is_open(envs, rows, cols, door_types, turns)
+                     & self.is_open(envs, adj_rows, adj_cols,
+                                    np.take(DoorSchedule.opposite_door, door_types), turns))
+        crossing = envs[can_cross]
+        self.cur_pos[crossing, 0] = adj_rows[can_cross]
+        self.cur_pos[crossing, 1] = adj_cols[can_cross]
+
+        self.valid_moves[active & (actions == constants.WAIT)] += 1
+        self.valid_moves[crossing] += 1
+
+        self.goal_reached |= active & (self.cur_pos == self.end_pos).all(axis=1)
+        self.done |= self.goal_reached
+        if self.max_turns is not None:
+            self.done |= self.turns >= self.max_turns
+
+        reward = -active.astype(float)
+        info = {"turns": self.turns.copy(), "valid_moves": self.valid_moves.copy(),
+                "goal_reached": self.goal_reached.copy()}
+        return self.get_observation(), reward, self.done.copy(), info
+
+    def get_observation(self):
+        """Batched percept of every game, for the turn about to be played
+
+            Returns:
+                dict: door_window, the (n_envs, 2 * window_offset + 1, 2 * window_offset + 1, 4) int8 array of door
+                    states indexed like TimingMazeState.door_window (0 for doors that are not visible), and the
+                    (n_envs, 2) end_offset and start_offset and (n_envs,) is_end_visible arrays
+        """
+        stencil = self.stencil
+        e = self.window_offset
+        padded_dim = self.padded_frequencies.shape[1]
+        cells = ((np.arange(self.n_envs) * padded_dim + self.cur_pos[:, 0] + e) * padded_dim
+                 + self.cur_pos[:, 1] + e) * 4
+        index = cells[:, None] + self.stencil_index[None, :]
+
+        frequencies = np.take(self.padded_frequencies, index)
+        is_open = (frequencies > 0) & ((self.turns[:, None] + 1) % np.maximum(frequencies, 1) == 0)
+        self.door_states = np.where(is_open, np.int8(constants.OPEN), np.take(self.closed_states, index))
+
+        window_size = 2 * e + 1
+        door_window = np.zeros((self.n_envs, window_size * window_size * 4), dtype=np.int8)
+        door_window[:, self.window_index] = self.door_states
+        door_window = door_window.reshape(self.n_envs, window_size, window_size, 4)
+
+        end_offset = self.end_pos - self.cur_pos
+        is_end_visible = stencil.visible_cells[np.clip(end_offset[:, 0] + e, 0, window_size - 1),
+                                               np.clip(end_offset[:, 1] + e, 0, window_size - 1)]
+        is_end_visible &= (np.abs(end_offset) <= e).all(axis=1)
+        is_end_visible |= (end_offset == 0).all(axis=1)
+
+        return {"door_window": door_window, "end_offset": end_offset, "start_offset": self.start_pos - self.cur_pos,
+                "is_end_visible": is_end_visible}
+
+    def get_percept(self, env):
+        # The last percept of one game as the TimingMazeState the engine would give a player
+        on_map = self.door_states[env] != 0
+        percept = self.stencil.entries[on_map]
+        percept["state"] = self.door_states[env][on_map]
+        end_offset = self.end_pos[env] - self.cur_pos[env]
+        start_offset = self.start_pos[env] - self.cur_pos[env]
+        is_end_visible = bool((end_offset == 0).all()) or self.stencil.is_cell_visible(int(end_offset[0]),
+                                                                                        int(end_offset[1]))
+        return TimingMazeState(percept, is_end_visible, end_offset[0], end_offset[1], start_offset[0],
+                               start_offset[1])
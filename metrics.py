@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+
+# Recorded as the action of turns where the player returned nothing usable
+NO_ACTION = -2
+
+
+class MetricsCollector:
+    # Timed phases of a turn, each recorded as wall and CPU time in seconds
+    phases = ["visual", "player", "render"]
+
+    def __init__(self, capacity=4096):
+        """Per-turn timings, percept size, action and validity of a game
+
+            Values are written into preallocated arrays, which double in size when full, so recording
+            a turn is a handful of array stores.
+
+            Args:
+                capacity (int): number of turns to preallocate
+        """
+        self.n_turns = 0
+        self.turns = np.zeros(capacity, dtype=np.int64)
+        self.times = np.full((capacity, 2 * len(self.phases)), np.nan)
+        self.percept_sizes = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.full(capacity, NO_ACTION, dtype=np.int8)
+        self.valid = np.zeros(capacity, dtype=bool)
+
+    def grow(self):
+        capacity = 2 * len(self.turns)
+        self.turns = np.resize(self.turns, capacity)
+        self.times = np.concatenate([self.times, np.full_like(self.times, np.nan)])
+        self.percept_sizes = np.resize(self.percept_sizes, capacity)
+        self.actions = np.resize(self.actions, capacity)
+        self.valid = np.resize(self.valid, capacity)
+
+    def record_turn(self, turn, visual_wall, visual_cpu, player_wall, player_cpu, percept_size, action, valid):
+        if self.n_turns == len(self.turns):
+            self.grow()
+        i = self.n_turns
+        self.turns[i] = turn
+        self.times[i, 0:4] = (visual_wall, visual_cpu, player_wall, player_cpu)
+        self.percept_sizes[i] = percept_size
+        self.actions[i] = action
+        self.valid[i] = valid
+        self.n_turns += 1
+
+    def record_render(self, wall, cpu):
+        # Rendering happens after the turn is recorded, so it belongs to the last recorded turn
+        if self.n_turns > 0:
+            self.times[self.n_turns - 1, 4:6] = (wall, cpu)
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        n = self.n_turns
+        data = {"turn": self.turns[:n]}
+        for i, phase in enumerate(self.phases):
+            data["{}_wall".format(phase)] = self.times[:n, 2 * i]
+            data["{}_cpu".format(phase)] = self.times[:n, 2 * i + 1]
+        data["percept_size"] = self.percept_sizes[:n]
+        data["action"] = self.actions[:n]
+        data["valid"] = self.valid[:n]
+        return pd.DataFrame(data)
+
+    def save(self, path):
+        # Parquet if the path ends with .parquet (requires pyarrow or fastparquet), CSV otherwise
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.splitext(path)[1] == ".parquet":
+            self.to_dataframe().to_parquet(path, index=False)
+        else:
+            self.to_dataframe().to_csv(path, index=False)
@@ -0,0 +1,201 @@
+import math
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import constants
+
+
+@lru_cache(maxsize=None)
+def get_divisor_table(horizon=constants.divisor_horizon):
+    """Divisors of every turn up to horizon, in increasing order
+
+        A sieve over the divisors costs about horizon * ln(horizon) steps in total, less than factoring a few
+        hundred turns one by one.
+
+        Returns:
+            Tuple[Tuple[int, ...], ...]: entry n holds the divisors of n, entry 0 is empty
+    """
+    divisors = [[] for _ in range(horizon + 1)]
+    for divisor in range(1, horizon + 1):
+        for multiple in range(divisor, horizon + 1, divisor):
+            divisors[multiple].append(divisor)
+    return tuple(tuple(entry) for entry in divisors)
+
+
+def get_divisors(n, horizon=constants.divisor_horizon):
+    # Divisors of n in increasing order, from the table when n is within its horizon
+    if 0 <= n <= horizon:
+        return get_divisor_table(horizon)[n]
+    small = [i for i in range(1, math.isqrt(n) + 1) if n % i == 0]
+    return tuple(small + [n // i for i in reversed(small) if i * i != n])
+
+
+class NumberTheoryTables:
+    def __init__(self, max_door_frequency, horizon=constants.divisor_horizon):
+        """Divisors, LCMs and common open turns of door frequencies, precomputed for a game
+
+            Use get_number_theory_tables to share the tables between players instead of building new ones.
+
+            Args:
+                max_door_frequency (int): the maximum door frequency of the game
+                horizon (int): the divisors of turns up to horizon are tabulated, later turns are factored on demand
+        """
+        self.max_door_frequency = max_door_frequency
+        self.horizon = horizon
+        self.divisor_table = get_divisor_table(horizon)
+
+        # LCM of every pair of frequencies, 0 if either door never opens. The table is shared, so it is read-only.
+        frequencies = np.arange(max_door_frequency + 1)
+        self.lcm_table = np.lcm.outer(frequencies, frequencies)
+        self.lcm_table.setflags(write=False)
+        # Nested lists are faster to index than the array for one pair at a time
+        self.lcm_lists = self.lcm_table.tolist()
+
+    def get_divisors(self, n):
+        if 0 <= n <= self.horizon:
+            return self.divisor_table[n]
+        return get_divisors(n, self.horizon)
+
+    def lcm(self, a, b):
+        # Period on which doors with frequencies a and b are open together, 0 if either never opens
+        if 0 <= a <= self.max_door_frequency and 0 <= b <= self.max_door_frequency:
+            return self.lcm_lists[a][b]
+        return math.lcm(int(a), int(b))
+
+    def next_common_open_turn(self, a, b, turn):
+        # First turn from turn on on which doors with frequencies a and b are both open, None if never
+        period = self.lcm(a, b)
+        if period == 0:
+            return None
+        return -(-turn // period) * period
+
+    def next_common_open_turns(self, a, b, turn):
+        """Vectorized next_common_open_turn for frequencies up to max_door_frequency
+
+            Args:
+                a, b (np.ndarray): frequencies of the two doors of every pair
+                turn (int or np.ndarray): turn from which to look, for all pairs or for each of them
+            Returns:
+                np.ndarray: first common open turn of every pair, -1 for pairs that are never open together
+        """
+        periods = self.lcm_table[a, b]
+        safe_periods = np.maximum(periods, 1)
+        return np.where(periods > 0, -(-np.asarray(turn) // safe_periods) * safe_periods, -1)
+
+
+@lru_cache(maxsize=None)
+def get_number_theory_tables(max_door_frequency, horizon=constants.divisor_horizon):
+    # The tables only depend on their arguments, so build them once per process and share them
+    return NumberTheoryTables(max_door_frequency, horizon)
+
+
+def get_candidate_mask(candidates):
+    # Bitmask of candidate frequencies, bit f for frequency f and bit 0 for a door that never opens
+    mask = 0
+    for frequency in candidates:
+        mask |= 1 << int(frequency)
+    return mask
+
+
+def get_mask_candidates(mask):
+    # Candidate frequencies of a bitmask, in increasing order
+    return [frequency for frequency in range(mask.bit_length()) if mask >> frequency & 1]
+
+
+class ExpectedWaitTable:
+    def __init__(self, max_door_frequency, max_period=constants.expected_wait_max_period,
+                 max_size=constants.expected_wait_max_size):
+        """Turns to wait until both doors of a wall are open, by candidate frequency masks of the doors
+
+            Under a uniform prior every pair of candidates of the two doors is equally likely. A pair of non-zero
+            frequencies opens the wall on the multiples of their LCM, so the total wait over the pairs repeats with
+            the LCM of these LCMs. When that period is at most max_period, the total wait of every turn modulo the
+            period is tabulated and a lookup is one index, otherwise the distinct LCMs are kept with their counts.
+            The entries are kept in LRU order and the least recently used ones are dropped once they hold more than
+            max_size values, so the common pairs, e.g. doors that were never seen, stay while rare ones come and go.
+
+            Use get_expected_wait_table to share the table between players instead of building a new one.
+
+            Args:
+                max_door_frequency (int): the maximum door frequency of the game
+                max_period (int): longest period that is tabulated
+                max_size (int): number of values the entries may hold
+        """
+        self.max_door_frequency = max_door_frequency
+        self.max_period = max_period
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get_entry(self, mask_a, mask_b):
+        """(pairs that open, sum of their LCMs, waits by turn modulo period or None, LCMs, counts) of a pair of masks"""
+        key = (mask_a, mask_b) if mask_a <= mask_b else (mask_b, mask_a)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        candidates_a = np.array([frequency for frequency in get_mask_candidates(mask_a) if frequency > 0], dtype=np.int64)
+        candidates_b = np.array([frequency for frequency in get_mask_candidates(mask_b) if frequency > 0], dtype=np.int64)
+        lcms, counts = np.unique(np.lcm.outer(candidates_a, candidates_b), return_counts=True)
+
+        # Stop as soon as the period is too long to tabulate, the LCM of many frequencies overflows int64
+        period = 1
+        for lcm in lcms.tolist():
+            period = math.lcm(period, lcm)
+            if period > self.max_period:
+                break
+
+        waits = None
+        if period <= self.max_period:
+            turns = np.arange(period)
+            waits = np.zeros(period, dtype=np.int64)
+            for lcm, count in zip(lcms.tolist(), counts.tolist()):
+                waits += count * (-turns % lcm)
+        entry = (int(counts.sum()), int((lcms * counts).sum()), waits, lcms, counts)
+
+        self.entries[key] = entry
+        self.size += len(waits) if waits is not None else len(lcms)
+        while self.size > self.max_size and len(self.entries) > 1:
+            _, (_, _, old_waits, old_lcms, _) = self.entries.popitem(last=False)
+            self.size -= len(old_waits) if old_waits is not None else len(old_lcms)
+        return entry
+
+    def count_open_pairs(self, mask_a, mask_b):
+        # Number of candidate pairs with which the wall ever opens
+        return self.get_entry(mask_a, mask_b)[0]
+
+    def get_wait_sum(self, mask_a, mask_b, turn):
+        # Sum over the candidate pairs with which the wall opens of the turns from turn on until it is open, 0 if it is
+        # open on turn
+        _, _, waits, lcms, counts = self.get_entry(mask_a, mask_b)
+        if waits is not None:
+            return int(waits[turn % len(waits)])
+        return int((counts * (-turn % lcms)).sum())
+
+    def expected_wait(self, mask_a, mask_b, turn):
+        """Expected turns from turn on until both doors are open, given that they ever are
+
+            Args:
+                mask_a, mask_b (int): candidate frequency masks of the two doors, see get_candidate_mask
+                turn (int): turn from which to wait
+            Returns:
+                float: the mean wait over the candidate pairs that open the wall, inf if none does
+        """
+        n_open = self.count_open_pairs(mask_a, mask_b)
+        if n_open == 0:
+            return math.inf
+        return self.get_wait_sum(mask_a, mask_b, turn) / n_open
+
+    def expected_period(self, mask_a, mask_b):
+        # Mean number of turns between two openings of the wall over the candidate pairs that open it, inf if none does
+        n_open, lcm_sum, _, _, _ = self.get_entry(mask_a, mask_b)
+        return lcm_sum / n_open if n_open else math.inf
+
+
+@lru_cache(maxsize=None)
+def get_expected_wait_table(max_door_frequency):
+    # One table per maximum door frequency, shared by the players of the process
+    return ExpectedWaitTable(max_door_frequency)
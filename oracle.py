@@ -0,0 +1,120 @@
+import argparse
+import glob
+import heapq
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+import constants
+from door_schedule import get_crossing_periods
+from maze import get_map_hash, load_maze
+
+# Solutions are cached in this directory, one JSON file per map named after its hash
+oracle_cache_dir = "oracle_cache"
+
+# Direction vectors, as in the engine
+dRow = [-1, 0, 1, 0]
+dCol = [0, -1, 0, 1]
+
+
+@dataclass
+class OracleSolution:
+    turns: int
+    actions: list
+
+
+def solve(map_frequencies, start_pos, end_pos):
+    """Minimum number of turns from start_pos to end_pos for a player knowing every door frequency
+
+        Rather than searching the (cell, turn mod L) state space, where L is the LCM of the frequencies in use
+        and can be astronomically large, this searches for the earliest arrival turn at every cell. Waiting is
+        allowed, so arriving at a cell earlier never makes a later move impossible, and the first arrival turn
+        found by Dijkstra's algorithm is exact.
+
+        Returns:
+            OracleSolution: number of turns and the action of every turn, None if the end cannot be reached
+    """
+    periods = get_crossing_periods(map_frequencies).tolist()
+    start = (int(start_pos[0]), int(start_pos[1]))
+    end = (int(end_pos[0]), int(end_pos[1]))
+
+    arrival = {start: 0}
+    parents = {}
+    queue = [(0, start)]
+    while queue:
+        turn, cell = heapq.heappop(queue)
+        if cell == end:
+            break
+        if turn > arrival[cell]:
+            continue
+        x, y = cell
+        for door_type, period in enumerate(periods[x][y]):
+            if period == 0:
+                continue
+            # Cross on the first turn after this one on which both doors are open
+            next_turn = (turn // period + 1) * period
+            neighbour = (x + dRow[door_type], y + dCol[door_type])
+            if next_turn < arrival.get(neighbour, np.inf):
+                arrival[neighbour] = next_turn
+                parents[neighbour] = (cell, door_type)
+                heapq.heappush(queue, (next_turn, neighbour))
+
+    if end not in arrival:
+        return None
+
+    # Walk back from the end, waiting on every turn before the one a door is crossed
+    actions = []
+    cell = end
+    while cell != start:
+        parent, door_type = parents[cell]
+        actions.append(door_type)
+        actions += [constants.WAIT] * (arrival[cell] - arrival[parent] - 1)
+        cell = parent
+    actions.reverse()
+    return OracleSolution(turns=arrival[end], actions=actions)
+
+
+def get_oracle_solution(map_frequencies, start_pos, end_pos, cache_dir=oracle_cache_dir):
+    # Solve the map, or load its solution if it was solved before. None as cache_dir disables the cache.
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, "{}.json".format(get_map_hash(map_frequencies, start_pos,
+                                                                            end_pos).hex()))
+        if os.path.isfile(cache_path):
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            return OracleSolution(**cached) if cached else None
+
+    solution = solve(map_frequencies, start_pos, end_pos)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first, so that parallel games never read a partially written solution
+        temporary_path = "{}.{}".format(cache_path, os.getpid())
+        with open(temporary_path, "w") as f:
+            json.dump(solution.__dict__ if solution else None, f)
+        os.replace(temporary_path, cache_path)
+    return solution
+
+
+def get_oracle_turns(map_frequencies, start_pos, end_pos, cache_dir=oracle_cache_dir):
+    solution = get_oracle_solution(map_frequencies, start_pos, end_pos, cache_dir)
+    return solution.turns if solution else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Minimum number of turns of every map for a player knowing "
+                                                 "every door frequency")
+    parser.add_argument("mazes", nargs="*", default=[os.path.join("maps", "**", "*.json")],
+                        help="Map files or glob patterns")
+    parser.add_argument("--no_cache", action="store_true", help="Solve every map even if it was solved before")
+    args = parser.parse_args()
+
+    for pattern in args.mazes:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            map_frequencies, start_pos, end_pos = load_maze(path)
+            turns = get_oracle_turns(map_frequencies, start_pos, end_pos,
+                                     cache_dir=None if args.no_cache else oracle_cache_dir)
+            print("{}: {}".format(path, turns if turns is not None else "unreachable"))
@@ -0,0 +1,84 @@
+import importlib
+import json
+import os
+from importlib.metadata import entry_points
+
+import constants
+
+# Entry point group third party packages can use to provide players,
+# e.g. [project.entry-points."timing_maze.players"] my_player = "my_package.player:Player"
+entry_point_group = "timing_maze.players"
+
+# Player id -> (player name, "module:class"). Modules are only imported when the player is selected.
+player_paths = {
+    "d": ("Default Player", "players.default_player:Player"),
+    "1": ("Group 1", "players.g1_player:Player"),
+    "2": ("Group 2", "players.g2_player:Player"),
+    "3": ("Group 3", "players.g3_player:Player"),
+    "4": ("Group 4", "players.g4_player:Player"),
+    "4m": ("Group 4 MCTS", "players.g4.g4_player:Player"),
+    "5": ("Group 5", "players.group5.player:G5_Player"),
+    "6": ("Group 6", "players.G6_Player:G6_Player"),
+    "7": ("Group 7", "players.g7.g7_player:Player"),
+    "9": ("Group 9", "players.group9_player:Player"),
+}
+
+
+def register_player(player_id, import_path, player_name=None):
+    if player_name is None:
+        player_name = "Player {}".format(player_id)
+    player_paths[player_id] = (player_name, import_path)
+
+
+def load_registry_file(path):
+    """Register the players listed in a JSON file
+
+        The file maps player ids to an import path or to an object with "path" and optional "name",
+        e.g. {"10": "players.g10_player:Player", "11": {"path": "my_player:Player", "name": "Eleven"}}
+    """
+    with open(path, "r") as f:
+        registry = json.load(f)
+    for player_id, entry in registry.items():
+        if isinstance(entry, str):
+            register_player(player_id, entry)
+        else:
+            register_player(player_id, entry["path"], entry.get("name"))
+
+
+entry_points_loaded = False
+
+
+def load_entry_points():
+    # Scanning the installed packages takes a while, so only do it when a player is not found
+    global entry_points_loaded
+    if entry_points_loaded:
+        return
+    entry_points_loaded = True
+    for entry_point in entry_points(group=entry_point_group):
+        if entry_point.name not in player_paths:
+            register_player(entry_point.name, entry_point.value)
+
+
+def get_player_ids():
+    load_entry_points()
+    return list(player_paths)
+
+
+def is_registered(player_id):
+    if player_id not in player_paths:
+        load_entry_points()
+    return player_id in player_paths
+
+
+def get_player_name(player_id):
+    return player_paths[player_id][0]
+
+
+def load_player_class(player_id):
+    # Import the player's module only now that it is selected
+    module_name, class_name = player_paths[player_id][1].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+if os.path.isfile(constants.player_registry_file):
+    load_registry_file(constants.player_registry_file)
@@ -53,75 +53,48 @@ class Player:
                     RIGHT = 2
                     DOWN = 3
         """
-        direction = [0, 0, 0, 0]
-        for maze_state in current_percept.maze_state:
-            if maze_state[0] == 0 and maze_state[1] == 0:
-                direction[maze_state[2]] = maze_state[3]
+        direction = [current_percept.get_door_state(0, 0, door_type) for door_type in range(4)]
 
         if current_percept.is_end_visible:
             if abs(current_percept.end_x) >= abs(current_percept.end_y):
                 if current_percept.end_x > 0 and direction[constants.RIGHT] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 1 and maze_state[1] == 0 and maze_state[2] == constants.LEFT
-                                and maze_state[3] == constants.OPEN):
-                            return constants.RIGHT
+                    if current_percept.get_door_state(1, 0, constants.LEFT) == constants.OPEN:
+                        return constants.RIGHT
                 if current_percept.end_x < 0 and direction[constants.LEFT] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == -1 and maze_state[1] == 0 and maze_state[2] == constants.RIGHT
-                                and maze_state[3] == constants.OPEN):
-                            return constants.LEFT
+                    if current_percept.get_door_state(-1, 0, constants.RIGHT) == constants.OPEN:
+                        return constants.LEFT
                 if current_percept.end_y < 0 and direction[constants.UP] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 0 and maze_state[1] == -1 and maze_state[2] == constants.DOWN
-                                and maze_state[3] == constants.OPEN):
-                            return constants.UP
+                    if current_percept.get_door_state(0, -1, constants.DOWN) == constants.OPEN:
+                        return constants.UP
                 if current_percept.end_y > 0 and direction[constants.DOWN] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 0 and maze_state[1] == 1 and maze_state[2] == constants.UP
-                                and maze_state[3] == constants.OPEN):
-                            return constants.DOWN
+                    if current_percept.get_door_state(0, 1, constants.UP) == constants.OPEN:
+                        return constants.DOWN
                 return constants.WAIT
             else:
                 if current_percept.end_y < 0 and direction[constants.UP] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 0 and maze_state[1] == -1 and maze_state[2] == constants.DOWN
-                                and maze_state[3] == constants.OPEN):
-                            return constants.UP
+                    if current_percept.get_door_state(0, -1, constants.DOWN) == constants.OPEN:
+                        return constants.UP
                 if current_percept.end_y > 0 and direction[constants.DOWN] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 0 and maze_state[1] == 1 and maze_state[2] == constants.UP
-                                and maze_state[3] == constants.OPEN):
-                            return constants.DOWN
+                    if current_percept.get_door_state(0, 1, constants.UP) == constants.OPEN:
+                        return constants.DOWN
                 if current_percept.end_x > 0 and direction[constants.RIGHT] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == 1 and maze_state[1] == 0 and maze_state[2] == constants.LEFT
-                                and maze_state[3] == constants.OPEN):
-                            return constants.RIGHT
+                    if current_percept.get_door_state(1, 0, constants.LEFT) == constants.OPEN:
+                        return constants.RIGHT
                 if current_percept.end_x < 0 and direction[constants.LEFT] == constants.OPEN:
-                    for maze_state in current_percept.maze_state:
-                        if (maze_state[0] == -1 and maze_state[1] == 0 and maze_state[2] == constants.RIGHT
-                                and maze_state[3] == constants.OPEN):
-                            return constants.LEFT
+                    if current_percept.get_door_state(-1, 0, constants.RIGHT) == constants.OPEN:
+                        return constants.LEFT
                 return constants.WAIT
         else:
             if direction[constants.LEFT] == constants.OPEN:
-                for maze_state in current_percept.maze_state:
-                    if (maze_state[0] == -1 and maze_state[1] == 0 and maze_state[2] == constants.RIGHT
-                            and maze_state[3] == constants.OPEN):
-                        return constants.LEFT
+                if current_percept.get_door_state(-1, 0, constants.RIGHT) == constants.OPEN:
+                    return constants.LEFT
             if direction[constants.DOWN] == constants.OPEN:
-                for maze_state in current_percept.maze_state:
-                    if (maze_state[0] == 0 and maze_state[1] == 1 and maze_state[2] == constants.UP
-                            and maze_state[3] == constants.OPEN):
-                        return constants.DOWN
+                if current_percept.get_door_state(0, 1, constants.UP) == constants.OPEN:
+                    return constants.DOWN
             if direction[constants.RIGHT] == constants.OPEN:
-                for maze_state in current_percept.maze_state:
-                    if (maze_state[0] == 1 and maze_state[1] == 0 and maze_state[2] == constants.LEFT
-                            and maze_state[3] == constants.OPEN):
-                        return constants.RIGHT
+                if current_percept.get_door_state(1, 0, constants.LEFT) == constants.OPEN:
+                    return constants.RIGHT
             if direction[constants.UP] == constants.OPEN:
-                for maze_state in current_percept.maze_state:
-                    if (maze_state[0] == 0 and maze_state[1] == -1 and maze_state[2] == constants.DOWN
-                            and maze_state[3] == constants.OPEN):
-                        return constants.UP
+                if current_percept.get_door_state(0, -1, constants.DOWN) == constants.OPEN:
+                    return constants.UP
             return constants.WAIT
\ No newline at end of file
@@ -5,6 +5,7 @@ import numpy as np
 import logging
 
 import constants
+from number_theory import get_number_theory_tables
 from timing_maze_state import TimingMazeState
 
 
@@ -25,6 +26,7 @@ class Player:
         self.logger = logger
         self.maximum_door_frequency = maximum_door_frequency
         self.radius = radius
+        self.number_theory = get_number_theory_tables(maximum_door_frequency)
         # x, y in seens and knowns is centered around start x, y
         self.seens = dict() # dictionary w/ kv - (x, y, d): (False (uncertain)/True (certain), assumed freq, [list of turns at which x, y, d was open], [list of turns at which x, y, d could be seen])
         self.knowns = dict() # dictionary w/ kv - (x, y): {0: freq(L), 1: freq(U), 2: freq(R), 3: freq(D)}, freq = -1 if unknown
@@ -48,18 +50,8 @@ class Player:
                 gap = seen[i + 1] - seen[i]
         return gap
     
-    @staticmethod
-    def lcm(x, y):
-        if x > y:
-            greater = x
-        else:
-            greater = y
-        while(True):
-            if((greater % x == 0) and (greater % y == 0)):
-                lcm = greater
-                break
-            greater += 1
-        return lcm
+    def lcm(self, x, y):
+        return self.number_theory.lcm(x, y)
     
     # setting frequencies for doors that have been seen
     # TODO: adapt the data structure so that it tells us which turns a door was in sight for (to help with certainty); currently will never be certain, will just assume the smallest difference
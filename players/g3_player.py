@@ -101,34 +101,28 @@ class Player:
             return self.move_inside_out(current_percept)
 
     def update_door_timers(self, current_percept):
-        door_seen = np.full((201, 201, 4), False, dtype=bool)
-        for cell in current_percept.maze_state:
-            x, y, direction, state = cell
-
-            # positions relative to start position
-            abs_x = x - current_percept.start_x
-            abs_y = y - current_percept.start_y
-            door_seen[abs_x, abs_y, direction] = True
-
-            # if we see the door on this turn, then increment the timer if the door is closed
-            if state == constants.CLOSED:
-                self.door_timers[abs_x, abs_y, direction] += 1
-
-            # if the door is closed for more than the maximum frequency, then mark it as always closed
-            if self.door_timers[abs_x, abs_y, direction] >= self.maximum_door_frequency:
-                self.always_closed[abs_x, abs_y, direction] = True
-
-            #if the door is open, then reset the timer
-            if state == constants.OPEN:
-                self.door_timers[abs_x, abs_y, direction] = 0
-
-        # for all doors that we were not present in current_percept.maze_state, set the timer as -1
-        for i in range(201):
-            for j in range(201):
-                for k in range(4):
-                    if not door_seen[i, j, k]:
-                        self.door_timers[i, j, k] = 0
+        doors = current_percept.maze_state_array
+        state = doors["state"]
 
+        # positions relative to start position
+        abs_x = doors["dx"] - current_percept.start_x
+        abs_y = doors["dy"] - current_percept.start_y
+        direction = doors["door"]
+
+        # if we see the door on this turn, then increment the timer if the door is closed
+        timers = self.door_timers[abs_x, abs_y, direction]
+        timers += state == constants.CLOSED
+
+        # if the door is closed for more than the maximum frequency, then mark it as always closed
+        closed_too_long = timers >= self.maximum_door_frequency
+        self.always_closed[abs_x[closed_too_long], abs_y[closed_too_long], direction[closed_too_long]] = True
+
+        #if the door is open, then reset the timer
+        timers[state == constants.OPEN] = 0
+
+        # for all doors that we were not present in current_percept.maze_state, set the timer as 0
+        self.door_timers.fill(0)
+        self.door_timers[abs_x, abs_y, direction] = timers
 
     def rush_in_vertical(self, current_percept, direction, rev_direction) -> int:
         if current_percept.end_y < 0:
@@ -10,7 +10,7 @@ from timing_maze_state import TimingMazeState
 # from qtable import QTable
 # from q_policy import QPolicy
 # from multi_armed_bandit.ucb import UpperConfidenceBounds
-from sympy import divisors
+from number_theory import get_divisors
 from collections import defaultdict
 
 class Player:
@@ -97,7 +97,7 @@ class Player:
             self.recently_seen_positions_list.pop()    
             
         self.turn += 1
-        factors = set(divisors(self.turn))
+        factors = set(get_divisors(self.turn))
         for dX, dY, door, state in current_percept.maze_state:
             #print(curr_x + dX, curr_y + dY, door, state)
             if state == constants.CLOSED:
@@ -6,18 +6,26 @@ import os
 import pickle
 import numpy as np
 import logging
-import math
+import multiprocessing
 
 import constants
 from timing_maze_state import TimingMazeState
-from players.g4.gridworld import GridWorld
-from players.g4.mcts import MCTS
+from players.g4.gridworld import GridWorld, update_door_frequencies
+from players.g4.mcts import MCTS, ParallelMCTS, get_subtree
 
 # from gridworld import GridWorld
 # from qtable import QTable
 # from q_policy import QPolicy
 # from multi_armed_bandit.ucb import UpperConfidenceBounds
-from sympy import divisors
+from number_theory import get_candidate_mask, get_expected_wait_table, get_number_theory_tables
+
+# Worker processes of the root parallel search, 1 searches in the player's process. Overridden per run by the
+# G4_MCTS_WORKERS environment variable, and always 1 where constants.serial_players_env is set.
+MCTS_WORKERS = os.cpu_count() or 1
+# Search time per move in seconds, overridden per run by the G4_MCTS_MOVE_TIME environment variable
+MCTS_MOVE_TIME = 0.03
+# Largest share of the player's remaining time (constants.timeout for the whole game) a single move may use
+MCTS_TIME_SHARE = 0.01
 
 
 # class MCTSNode:
@@ -248,11 +256,32 @@ class Player:
         self.frequencies_per_cell = defaultdict(
             lambda: set(range(maximum_door_frequency + 1))
         )
-        self.lcm_cache = {}
+        self.number_theory = get_number_theory_tables(maximum_door_frequency)
+        self.expected_waits = get_expected_wait_table(maximum_door_frequency)
         self.turn = 0
         self.start = (0,0)
         self.goal = None
 
+        # Time left of the engine's player time, which the player is not told about so it keeps count itself
+        self.time_left = constants.timeout
+        # Search tree of the previous turn and the action played, to continue from its subtree
+        self.root = None
+        self.previous_action = None
+        self.mcts_move_time = float(os.environ.get("G4_MCTS_MOVE_TIME", MCTS_MOVE_TIME))
+        self.mcts_workers = int(os.environ.get("G4_MCTS_WORKERS", MCTS_WORKERS))
+        # Tournament workers already use every CPU, and daemonic processes cannot start processes at all
+        if os.environ.get(constants.serial_players_env) or multiprocessing.current_process().daemon:
+            self.mcts_workers = 1
+        self.parallel_mcts = None
+        if self.mcts_workers > 1:
+            self.parallel_mcts = ParallelMCTS(self.mcts_workers, maximum_door_frequency, [LEFT, UP, RIGHT, DOWN, WAIT],
+                                             seed=int(rng.integers(2 ** 31)))
+
+    def __del__(self):
+        # Stop the search workers with the game instead of when the interpreter exits
+        if getattr(self, "parallel_mcts", None) is not None:
+            self.parallel_mcts.close()
+
     def set_goal(self, maze_state, curr_x, curr_y):
         ### improve
         # if the target is not visible, create an arbitrary goal
@@ -265,65 +294,20 @@ class Player:
         return goal
 
     def update_door_frequencies(self, curr_x, curr_y, curr_maze_state):
-        maze_state = {}
-        coords = (float('-inf'), float('-inf'))
-        factors = set(divisors(self.turn))
-        for dX, dY, door, state in curr_maze_state:
-            # update frequency dictionary
-            if state == constants.CLOSED:
-                self.frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] -= factors
-            elif state == constants.OPEN:
-                self.frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] &= factors
-            elif (curr_x + dX, curr_y + dY, door) not in self.frequencies_per_cell.keys() and state == constants.BOUNDARY:
-                self.frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] = {0}
-
-            # update maze state dictionary that reflects our coordinate system and has better accessibility
-            coords = (curr_x + dX, curr_y + dY)
-
-            if coords not in maze_state.keys():
-                maze_state[coords] = [(dX, dY, door, state)]
-            else:
-                maze_state[coords].append((dX, dY, door, state))
-
-        return maze_state
+        factors = set(self.number_theory.get_divisors(self.turn))
+        return update_door_frequencies(self.frequencies_per_cell, factors, curr_x, curr_y, curr_maze_state)
     
     def lcm(self, a, b):
-        # Return 0 if one of the values is 0 (door never opens)
-        if a == 0 or b == 0:
-            return 0
-        
-        # Sort the pair to ensure symmetry (e.g., lcm(4, 5) == lcm(5, 4))
-        key = tuple(sorted((a, b)))
-    
-        # Check if the LCM is already computed and stored in the cache
-        if key in self.lcm_cache:
-            return self.lcm_cache[key]
-    
-        # Compute the LCM and store it in the cache
-        result = abs(a * b) // math.gcd(a, b)
-        self.lcm_cache[key] = result
-        
-        return result
+        # 0 if one of the values is 0 (door never opens)
+        return self.number_theory.lcm(a, b)
     
     '''Function which returns an approximation of the number of turns from the current turn needed to
         wait before adjacent doors are open at the same time'''
     def avg_time_for_both_doors_to_open(self, door1_freq_set, door2_freq_set, curr_turn):
-        lcm_values = []
-    
-        # Loop through all possible frequency pairs from set1 and set2
-        for f1 in door1_freq_set:
-            for f2 in door2_freq_set:
-                if f1 != 0 and f2 != 0:  # Skip cases where one of the doors never opens
-                    next_open_time = self.lcm(f1, f2)
-                
-                    # Check when the doors will next be open after the current turn
-                    if next_open_time != 0:
-                        # Calculate how far ahead from current turn both doors will be open
-                        next_open_turn = (next_open_time - curr_turn % next_open_time) % next_open_time
-                        lcm_values.append(next_open_turn)
-
-        # Compute the average of all next open times
-        return sum(lcm_values) / len(lcm_values) if lcm_values else float('inf')
+        # Mean over the pairs of frequencies with which both doors open of the turns to wait, from the shared table
+        return self.expected_waits.expected_wait(
+            get_candidate_mask(door1_freq_set), get_candidate_mask(door2_freq_set), curr_turn
+        )
     
     def move(self, current_percept) -> int:
         """Function which retrieves the current state of the amoeba map and returns an amoeba movement
@@ -339,6 +323,7 @@ class Player:
                 DOWN = 3
         """
 
+        move_start = time.time()
         curr_x, curr_y = -current_percept.start_x, -current_percept.start_y
         self.turn += 1
         
@@ -350,12 +335,26 @@ class Player:
         # else call the set_goal method
 
 
-        # initialize gridworld and MCTS
-        env = GridWorld((curr_x, curr_y), maze_state, self.goal, current_percept.is_end_visible)
-        actions = [LEFT, UP, RIGHT, DOWN, WAIT]
-        mcts = MCTS(env, actions, self.frequencies_per_cell, self.turn, self.maximum_door_frequency, maze_state)
-        best_node = mcts.mcts((curr_x, curr_y), timeout=0.03)
-        best_node_actions = list(best_node.parent.children.keys())
+        timeout = min(self.mcts_move_time, self.time_left * MCTS_TIME_SHARE)
+        best_node_actions = None
+        if self.parallel_mcts is not None:
+            best_node_actions = self.parallel_mcts.search(current_percept.maze_state_array, (curr_x, curr_y), self.turn,
+                                                          self.goal, current_percept.is_end_visible,
+                                                          self.previous_action, timeout)
+            if best_node_actions is None:
+                # A worker died and the pool was closed, search in this process for the rest of the game
+                self.parallel_mcts = None
+        if best_node_actions is None:
+            # initialize gridworld and MCTS
+            env = GridWorld((curr_x, curr_y), maze_state, self.goal, current_percept.is_end_visible)
+            actions = [LEFT, UP, RIGHT, DOWN, WAIT]
+            mcts = MCTS(env, actions, self.frequencies_per_cell, self.turn, self.maximum_door_frequency, maze_state)
+            root = get_subtree(self.root, self.previous_action, (curr_x, curr_y))
+            best_node = mcts.mcts((curr_x, curr_y), timeout=timeout, root=root)
+            self.root = best_node.parent
+            # Most visited first, like the merged visits of the parallel search
+            children = self.root.children
+            best_node_actions = sorted(children, key=lambda action: children[action].visits, reverse=True)
         print(best_node_actions)
         
         # make sure the action is valid
@@ -389,4 +388,6 @@ class Player:
                 best_action = action
                 break
 
+        self.previous_action = best_action
+        self.time_left -= time.time() - move_start
         return best_action
@@ -1,6 +1,30 @@
 import constants
 from constants import WAIT, LEFT, UP, RIGHT, DOWN
 
+
+def update_door_frequencies(frequencies_per_cell, factors, curr_x, curr_y, curr_maze_state):
+    # Remove the frequencies ruled out by the percept, factors being the divisors of the current turn.
+    # Returns the visible doors grouped by cell in our coordinate system, for GridWorld.
+    maze_state = {}
+    for dX, dY, door, state in curr_maze_state:
+        # update frequency dictionary
+        if state == constants.CLOSED:
+            frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] -= factors
+        elif state == constants.OPEN:
+            frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] &= factors
+        elif (curr_x + dX, curr_y + dY, door) not in frequencies_per_cell.keys() and state == constants.BOUNDARY:
+            frequencies_per_cell[(curr_x + dX, curr_y + dY, door)] = {0}
+
+        # update maze state dictionary that reflects our coordinate system and has better accessibility
+        coords = (curr_x + dX, curr_y + dY)
+
+        if coords not in maze_state.keys():
+            maze_state[coords] = [(dX, dY, door, state)]
+        else:
+            maze_state[coords].append((dX, dY, door, state))
+
+    return maze_state
+
 class GridWorld:
     def __init__(self, state, maze_state, goal, is_end_visible):
         self.maze_state = maze_state
@@ -1,9 +1,12 @@
 import numpy as np
 import random
 from collections import defaultdict
+import multiprocessing
 import time
 import math
 import constants
+from number_theory import get_number_theory_tables
+from players.g4.gridworld import GridWorld, update_door_frequencies
 
 # Node class for MCTS
 class Node:
@@ -46,8 +49,10 @@ class MCTS:
         self.max_freq = max_freq
         self.maze_state = maze_state
 
-    def mcts(self, root_state=None, timeout=1):
-        root = Node(state=root_state)
+    def mcts(self, root_state=None, timeout=1, root=None):
+        # Keep searching from root if given, e.g. the subtree of the action chosen on the previous turn
+        if root is None:
+            root = Node(state=root_state)
         start_time = time.time()
 
         while time.time() - start_time < timeout:
@@ -272,4 +277,120 @@ class MCTS:
         while node is not None:
             node.visits += 1
             node.value += reward
-            node = node.parent
\ No newline at end of file
+            node = node.parent
+
+
+def get_subtree(root, action, state):
+    # Child of root reached by action, to reuse as the next root. None if there is none or the move ended elsewhere.
+    if root is None or action not in root.children:
+        return None
+    child = root.children[action]
+    if child.state != state:
+        return None
+    child.parent = None
+    return child
+
+
+def run_worker(connection, max_freq, actions, seed):
+    # Worker process of ParallelMCTS: keeps its own door frequencies and tree between turns and searches on request
+    random.seed(seed)
+    np.random.seed(seed)
+    number_theory = get_number_theory_tables(max_freq)
+    frequencies = defaultdict(lambda: set(range(max_freq + 1)))
+    root = None
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        percept, root_state, turn, goal, is_end_visible, previous_action, timeout = request
+        try:
+            factors = set(number_theory.get_divisors(turn))
+            maze_state = update_door_frequencies(frequencies, factors, root_state[0], root_state[1], percept.tolist())
+            env = GridWorld(root_state, maze_state, goal, is_end_visible)
+            mcts = MCTS(env, actions, frequencies, turn, max_freq, maze_state)
+            root = get_subtree(root, previous_action, root_state)
+            if root is None:
+                root = Node(state=root_state)
+            mcts.mcts(root_state, timeout=timeout, root=root)
+            connection.send({action: (child.visits, child.value) for action, child in root.children.items()})
+        except Exception as e:
+            root = None
+            connection.send(e)
+
+
+# Root parallel Monte Carlo Tree Search
+class ParallelMCTS:
+    def __init__(self, n_workers, max_freq, actions, seed=None):
+        """Independent searches from the same root in worker processes, merged by visit counts
+
+            Every worker keeps its own door frequencies, updated from the percepts it is sent, so only the percept
+            of the turn goes through the pipes. Every worker also keeps its tree between turns and continues from
+            the subtree of the action that was played, so the rollouts of the previous turns are not thrown away.
+            The workers are daemons and stop with the player's process.
+
+            Args:
+                n_workers (int): number of worker processes
+                max_freq (int): the maximum door frequency of the game
+                actions (List[int]): actions to search
+                seed (int): seed of the first worker, the others get the following seeds
+        """
+        seed = random.randrange(2 ** 31) if seed is None else seed
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.workers = []
+        for i in range(n_workers):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(target=run_worker, args=(worker_connection, max_freq, actions, seed + i), daemon=True)
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+    def search(self, percept, root_state, turn, goal, is_end_visible, previous_action=None, timeout=1):
+        """Search from root_state in every worker for timeout seconds
+
+            Every percept of the game has to be given, in order, for the workers' door frequencies to be right.
+
+            Args:
+                percept (np.ndarray): maze_state_array of the turn's TimingMazeState
+                root_state (Tuple[int, int]): current position
+                turn (int): the current turn
+                goal (Tuple[int, int]): the goal of the search
+                is_end_visible (bool): whether the goal is the end
+                previous_action (int): action played on the previous turn, whose subtree is reused if it led to
+                    root_state
+                timeout (float): search time of every worker in seconds
+            Returns:
+                List[int]: actions of the root, most visited first. None if a worker died, the pool is closed then.
+        """
+        request = (percept, root_state, turn, goal, is_end_visible, previous_action, timeout)
+        try:
+            for connection in self.connections:
+                connection.send(request)
+            results = [connection.recv() for connection in self.connections]
+        except (EOFError, OSError):
+            # A worker died, and the others may have missed the percept, so none of them can be searched any more
+            self.close()
+            return None
+
+        visits = defaultdict(int)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+            for action, (child_visits, _) in result.items():
+                visits[action] += child_visits
+        return sorted(visits, key=visits.get, reverse=True)
+
+    def close(self):
+        # Stop the workers, those that died or do not answer are terminated. Closing twice does nothing.
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for worker in self.workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        self.connections = []
+        self.workers = []
@@ -7,14 +7,13 @@ import os
 import pickle
 import numpy as np
 import logging
-import math
 
 import constants
 from timing_maze_state import TimingMazeState
 from players.g4.gridworld import GridWorld
 from players.g4.mcts import MCTS
 
-from sympy import divisors
+from number_theory import get_candidate_mask, get_expected_wait_table, get_number_theory_tables
 
 
 class Player:
@@ -42,14 +41,15 @@ class Player:
         self.frequencies_per_cell = defaultdict(
             lambda: set(range(maximum_door_frequency + 1))
         )
-        self.lcm_cache = {}
+        self.number_theory = get_number_theory_tables(maximum_door_frequency)
+        self.expected_waits = get_expected_wait_table(maximum_door_frequency)
         self.curr_turn = 0
         self.start = (0, 0)
         self.goal = None
         self.maze_graph = defaultdict(dict)
 
     def update_door_frequencies(self, curr_x, curr_y, current_percept):
-        factors = set(divisors(self.curr_turn))
+        factors = set(self.number_theory.get_divisors(self.curr_turn))
         for dX, dY, door, state in current_percept.maze_state:
             # update frequency dictionary
             if state == constants.CLOSED:
@@ -105,48 +105,18 @@ class Player:
                 self.maze_graph[neighbor_pos][cell_pos] = expected_cost
 
     def lcm(self, a, b):
-        # Return 0 if one of the values is 0 (door never opens)
-        if a == 0 or b == 0:
-            return 0
-
-        # Check both (a, b) and (b, a) in cache to avoid unnecessary sorting
-        if (a, b) in self.lcm_cache:
-            return self.lcm_cache[(a, b)]
-        elif (b, a) in self.lcm_cache:
-            return self.lcm_cache[(b, a)]
-
-        # Compute the LCM and store it in the cache
-        result = abs(a * b) // math.gcd(a, b)
-        self.lcm_cache[(a, b)] = result
-
-        return result
+        # 0 if one of the values is 0 (door never opens)
+        return self.number_theory.lcm(a, b)
 
     """Function which returns an approximation of the number of turns from the current turn needed to
         wait before adjacent doors are open at the same time"""
 
     def avg_time_for_both_doors_to_open(self, door1_freq_set, door2_freq_set):
-        total_sum = 0
-        count = 0
-
-        # Loop through all possible frequency pairs from set1 and set2
-        for f1 in door1_freq_set:
-            for f2 in door2_freq_set:
-                if f1 != 0 and f2 != 0:  # Skip cases where one of the doors never opens
-                    next_open_time = self.lcm(f1, f2)
-
-                    # If we don't care about current cycle, just avg expected moves to wait
-                    if next_open_time != 0:
-                        total_sum += next_open_time
-                        count += 1
-
-                    # if next_open_time != 0:
-                    #     # Calculate how far ahead from current turn both doors will be open
-                    #     next_open_turn = (-self.curr_turn % next_open_time)
-                    #     total_sum += next_open_turn
-                    #     count += 1
-
-        # Compute and return the average of all next open times
-        return total_sum / count if count > 0 else float("inf")
+        # Mean LCM over the pairs of frequencies with which both doors open, from the shared table.
+        # If we cared about the current cycle, self.expected_waits.expected_wait gives the wait from self.curr_turn
+        return self.expected_waits.expected_period(
+            get_candidate_mask(door1_freq_set), get_candidate_mask(door2_freq_set)
+        )
 
     def opposite_door(self, door):
         if door == constants.LEFT:
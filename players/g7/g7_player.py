@@ -46,7 +46,7 @@ class Player:
         self.logger = logger
         self.maximum_door_frequency = maximum_door_frequency
         self.radius = radius
-        self.memory = PlayerMemory()
+        self.memory = PlayerMemory(maximum_door_frequency)
         self.turn = 0
         self.starting_position_set = False #check
 
@@ -71,7 +71,7 @@ class Player:
         move = constants.WAIT
 
         # Decide on the next move based on the current percept.
-        self.memory.update_memory(current_percept.maze_state, self.turn)
+        self.memory.update_memory(current_percept.maze_state_array, self.turn)
         
         # Build the graph from the updated memory
         currentGraph = build_graph_from_memory(self.memory)
@@ -1,105 +1,59 @@
-import random
-
-from dataclasses import dataclass
 import networkx as nx
 import matplotlib.pyplot as plt
-from math import lcm
 import constants
-from utils import get_divisors
+from frequency_beliefs import FrequencyBeliefGrid
+from door_schedule import get_crossing_periods
 import numpy as np
 import heapq
 
 
-class MemoryDoor:
-    def __init__(self):
-        self.is_certain_freq = False
-        self.observations = {} # {turn : 1 - Closed / 2 - Open / 3 - Boundary}
-        self.freq_distribution = {}
-    
-    def is_open(self, turn):
-        # Returns if the door is open at a given turn
-        return self.observations.get(turn, 1) == 2
-    
-    def update_observations(self, door_state, turn):
-        # Updates observed freqs, runs get_freq
-        if not self.is_certain_freq:
-            self.observations[turn] = door_state
-            self.freq_distribution = self.get_freq()
-            if len(self.freq_distribution) == 1:
-                self.is_certain_freq = True
-    
-    def get_freq(self):
-        # Tries to find the frequency given observed, returns a probability distribution
-        possible_open_frequencies = set()
-        closed_frequencies = set()
-
-        # Iterate over the frequency conditions
-        for turn, status in self.observations.items():
-            if status == 2:
-                # Add all divisors of the frequency if it's open
-                if not possible_open_frequencies:
-                    possible_open_frequencies = get_divisors(turn)
-                else:
-                    possible_open_frequencies &= get_divisors(turn)
-            else:
-                # Add all divisors of the closed frequency
-                closed_frequencies |= get_divisors(turn)
-
-        # Remove any closed frequencies from the possible open set
-        possible_open_frequencies -= closed_frequencies
-
-        # Assign equal probabilities to each remaining frequency
-        total_frequencies = len(possible_open_frequencies)
-        probability_distribution = {
-            freq: 1/total_frequencies for 
-            freq in possible_open_frequencies} if total_frequencies > 0 else {}
-
-        return probability_distribution
-    
-    def roll_freq(self):
-        # Returns a frequency based on the distribution
-            # Calculate cumulative distribution
-        if self.freq_distribution == {}:
-            return 0
-        cumulative_dist = []
-        cumulative_sum = 0
-        for freq, prob in self.freq_distribution.items():
-            cumulative_sum += prob
-            cumulative_dist.append((cumulative_sum, freq))
-        
-        rand = np.random.random()
-        
-        # Choose the frequency based on the random number
-        for cumulative_prob, freq in cumulative_dist:
-            if rand <= cumulative_prob:
-                return freq
-
-        # In case the random number is exactly 1, return the last frequency
-        return cumulative_dist[-1][1]
-        
-
-class MemorySquare:
-    def __init__(self):
-        left = MemoryDoor()
-        up = MemoryDoor()
-        right = MemoryDoor()
-        down = MemoryDoor()
-        self.doors = {constants.LEFT:left, constants.UP:up, constants.RIGHT:right, constants.DOWN:down}
-
 class PlayerMemory:
-    def __init__(self, map_size: int = 100):
-        self.memory = [[MemorySquare() for _ in range(map_size * 2)] for _ in range(map_size * 2)]
+    def __init__(self, max_door_frequency: int, map_size: int = 100):
+        """Everything seen of the doors, as dense arrays indexed [y][x][door_type] around the start position
+
+            Args:
+                max_door_frequency (int): the maximum frequency of doors
+                map_size (int): the memory spans map_size cells on every side of the start position
+        """
+        shape = (map_size * 2, map_size * 2)
+        # Observation bitsets: bit f of a door is set while frequency f agrees with every observation of it, and
+        # bit 0 until the door has been seen open
+        self.beliefs = FrequencyBeliefGrid(max_door_frequency, shape)
+        # Frequency of the doors down to a single candidate, 0 for the others
+        self.certain_frequencies = np.zeros(shape + (4,), dtype=int)
+        # Doors seen open with several candidate frequencies left, the only ones that need sampling
+        self.uncertain = np.zeros(shape + (4,), dtype=bool)
+        # Frequencies drawn by the last sample_frequencies, 0 for doors never seen open
+        self.sampled_frequencies = np.zeros(shape + (4,), dtype=int)
         self.pos = (map_size, map_size) #(y, x)
-    
+
+    def get_candidate_bits(self, masks):
+        # (n, max_door_frequency + 1) boolean array of the candidates of n doors, from their bitsets
+        bits = np.unpackbits(masks.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+        return bits[:, :self.beliefs.max_door_frequency + 1].astype(bool)
+
     def update_memory(self, state, turn):
-        # state = [door] = (row_offset, col_offset, door_type, door_status)
-        for s in state:
-            # if s[0] == -1 and s[1] == 0:
-                # print("ya")
-            square = self.memory[self.pos[0] + s[1]][self.pos[1] + s[0]]
-            door = square.doors[s[2]]
-            door_state = s[3]
-            door.update_observations(door_state, turn)
+        # state = structured percept array with the fields dx, dy, door and state (see TimingMazeState)
+        rows = self.pos[0] + state["dy"]
+        cols = self.pos[1] + state["dx"]
+        door_types = state["door"]
+        self.beliefs.observe(rows, cols, door_types, state["state"], turn)
+
+        bits = self.get_candidate_bits(self.beliefs.masks[rows, cols, door_types])
+        seen_open = ~bits[:, 0]
+        counts = bits.sum(axis=1)
+        certain = seen_open & (counts == 1)
+        self.certain_frequencies[rows[certain], cols[certain], door_types[certain]] = np.argmax(bits[certain], axis=1)
+        self.uncertain[rows, cols, door_types] = seen_open & (counts > 1)
+
+    def sample_frequencies(self):
+        # Draws a frequency for every door, uniformly among its candidates, and 0 for doors never seen open
+        self.sampled_frequencies[...] = self.certain_frequencies
+        rows, cols, door_types = np.nonzero(self.uncertain)
+        bits = self.get_candidate_bits(self.beliefs.masks[rows, cols, door_types])
+        picks = (np.random.random(len(bits)) * bits.sum(axis=1)).astype(int)
+        self.sampled_frequencies[rows, cols, door_types] = np.argmax(np.cumsum(bits, axis=1) > picks[:, None], axis=1)
+        return self.sampled_frequencies
 
     def update_pos(self, move):
         if move == constants.LEFT:
@@ -157,42 +111,44 @@ class PlayerMemory:
         return False
 
 class MazeGraph:
-    def __init__(self, graph: dict = {}):
-        self.graph = graph  # A dictionary for the adjacency list
-        
-    def add_edge(self, node1: tuple, node2: tuple, weight: int):
-        if node1 not in self.graph:  # Check if the node is already added
-            self.graph[node1] = {}   # If not, create the node
-        self.graph[node1][node2] = weight  # Else, add a connection to its neighbor
-    
-    def add_bidirectional_edge(self, node1: tuple, node2: tuple, node1_door_freq: int, node2_door_freq: int):
-        """Adds an edge both ways between node1 and node2."""
-        self.add_edge(node1, node2, [node1_door_freq, node2_door_freq])
-        self.add_edge(node2, node1, [node2_door_freq, node1_door_freq])
-    
+    # Neighbours in the order the adjacency lists used to be built in, which breaks ties between equally fast paths
+    neighbour_order = (constants.UP, constants.LEFT, constants.RIGHT, constants.DOWN)
+    dy = {constants.LEFT: 0, constants.UP: -1, constants.RIGHT: 0, constants.DOWN: 1}
+    dx = {constants.LEFT: -1, constants.UP: 0, constants.RIGHT: 1, constants.DOWN: 0}
+
+    def __init__(self, periods: np.ndarray):
+        # periods[y][x][door_type] = turns between two crossings of the door, 0 if it is never crossed
+        self.periods = periods
+        self.period_lists = periods.tolist()
+
     def getMazeDimension(self) -> int:
         # Returns the dimension of the maze (assuming it is a square)
-        return int(len(self.graph) ** 0.5)
-    
-    def getNeighbors(self, node) -> dict[tuple, int]:
-        return self.graph[node]
+        return self.periods.shape[0]
 
+    def getNeighbors(self, node) -> dict[tuple, int]:
+        # Neighbours that can be reached from node, with the period of the door in between
+        y, x = node
+        dimension = self.getMazeDimension()
+        neighbors = {}
+        for door_type in self.neighbour_order:
+            period = self.period_lists[y][x][door_type]
+            neighbor = (y + self.dy[door_type], x + self.dx[door_type])
+            if period > 0 and 0 <= neighbor[0] < dimension and 0 <= neighbor[1] < dimension:
+                neighbors[neighbor] = period
+        return neighbors
 
     def visualize_graph_in_grid(self, minDistanceArray=None, parent=None, startNode=None, targetNode=None, 
                                 row_slice=None, col_slice=None, figsize=30):
         G = nx.Graph()
+        grid_dim_int = self.getMazeDimension()
 
-        # Add nodes and edges from adjacency list
-        for node1, neighbors in self.graph.items():
-            for node2, weight in neighbors.items():
-                node1Freq, node2Freq = weight
-
-                # Calculate the edge weight
-                if node1Freq == 0 or node2Freq == 0:
-                    weight = float('inf')
-                else:
-                    # LCM is the combined frequency of the doors
-                    weight = lcm(node1Freq, node2Freq)
+        # Add nodes and edges, doors that never open have an infinite weight
+        for node1 in ((i, j) for i in range(grid_dim_int) for j in range(grid_dim_int)):
+            for door_type in self.neighbour_order:
+                node2 = (node1[0] + self.dy[door_type], node1[1] + self.dx[door_type])
+                if not (0 <= node2[0] < grid_dim_int and 0 <= node2[1] < grid_dim_int):
+                    continue
+                weight = self.period_lists[node1[0]][node1[1]][door_type] or float('inf')
 
                 # Only add nodes and edges within the specified row/col slice
                 if row_slice and col_slice:
@@ -202,8 +158,6 @@ class MazeGraph:
                 else:
                     G.add_edge(node1, node2, weight=weight)
 
-        grid_dim = len(self.graph) ** 0.5  # Square root of the number of nodes
-        grid_dim_int = int(grid_dim)  # Ensure square root is an integer for a square grid
         plt.figure(figsize=(figsize, figsize))
 
         # Define positions for nodes in a grid layout, restricted to the row and column slices
@@ -262,57 +216,12 @@ def reconstruct_path(parent, startNode, targetNode):
     return path
 
 def build_graph_from_memory(player_memory: PlayerMemory) -> MazeGraph:
-    graph = MazeGraph()
-
-    # Iterate through the map_memory and add edges to the graph
-    for y in range(len(player_memory.memory)): # i is the row index (basically y)
-        for x in range(len(player_memory.memory[0])): # j is the column index (basically x)
-            currMemSquare: MemorySquare = player_memory.memory[y][x]
-
-            # Coordinates for neighboring cells
-            neighbors = {
-                'left': (y, x-1),
-                'right': (y, x+1),
-                'up': (y-1, x),
-                'down': (y+1, x)
-            }
-            # test = [[(0,0),(0,1), (0,2), (0,3), (0,4)],
-            #  [(1,0),(1,1), (1,2), (1,3), (1,4)],
-            #  [(2,0),(2,1), (2,2), (2,3), (2,4)],
-            #  [(3,0),(3,1), (3,2), (3,3), (3,4)],
-            #  [(4,0),(4,1), (4,2), (4,3), (4,4)]]
-            
-            # Add edges based on door frequencies and valid neighboring cells
-            
-            # Left neighbor exists 
-            if x > 0:
-                leftSquare: MemorySquare = player_memory.memory[y][x - 1]
-                graph.add_bidirectional_edge((y, x), neighbors['left'],
-                                                currMemSquare.doors[constants.LEFT].roll_freq(),
-                                                leftSquare.doors[constants.RIGHT].roll_freq())
-
-            # Right neighbor exists 
-            if x < len(player_memory.memory[0]) - 1:  
-                rightSquare: MemorySquare = player_memory.memory[y][x + 1]
-                graph.add_bidirectional_edge((y, x), neighbors['right'],
-                                                currMemSquare.doors[constants.RIGHT].roll_freq(),
-                                                rightSquare.doors[constants.LEFT].roll_freq())
-            
-            # Up neighbor exists 
-            if y > 0: 
-                upSquare: MemorySquare = player_memory.memory[y - 1][x]
-                graph.add_bidirectional_edge((y, x), neighbors['up'],
-                                                currMemSquare.doors[constants.UP].roll_freq(),
-                                                upSquare.doors[constants.DOWN].roll_freq())
-            
-            # Down neighbor exists
-            if y < len(player_memory.memory) - 1:
-                downSquare: MemorySquare = player_memory.memory[y + 1][x]
-                graph.add_bidirectional_edge((y, x), neighbors['down'],
-                                                currMemSquare.doors[constants.DOWN].roll_freq(),
-                                                downSquare.doors[constants.UP].roll_freq())
-
-    return graph
+    frequencies = player_memory.sample_frequencies()
+
+    # Both doors of an edge are open on the multiples of the LCM of their frequencies. The memory is indexed (y, x),
+    # the transpose of the engine's coordinates that get_crossing_periods expects.
+    periods = get_crossing_periods(frequencies.transpose(1, 0, 2)).transpose(1, 0, 2)
+    return MazeGraph(periods)
 
 
 def findShortestPathsToEachNode(graph: MazeGraph, startNode: tuple, turnNumber: int):
@@ -334,7 +243,6 @@ def findShortestPathsToEachNode(graph: MazeGraph, startNode: tuple, turnNumber:
     # Process the heap until it is empty
     while minHeap:
         turnsToCurrentNode, currentNode = heapq.heappop(minHeap)
-        # currentXCoord, currentYCoord = currentNode         print("visiting: ", currentNode)
 
         # Skip node if already visited
         if currentNode in visitedNodes:
@@ -342,18 +250,10 @@ def findShortestPathsToEachNode(graph: MazeGraph, startNode: tuple, turnNumber:
 
         visitedNodes.add(currentNode)
 
-        # Get neighbors of the current node from the graph
-        neighbors: dict[tuple, tuple] = graph.getNeighbors(currentNode)
-
+        # Get the neighbors that can be reached from the current node, with the combined frequency of the doors
+        neighbors: dict[tuple, int] = graph.getNeighbors(currentNode)
 
-        for (yCoordNeighbour, xCoordNeighbour), (node1Freq, node2Freq) in neighbors.items():
-            # Combined Frequency of the doors
-            if node1Freq == 0 or node2Freq == 0:
-                combinedFrequencey = float('inf')
-            else:
-                # LCM is the combined frequency of the doors
-                combinedFrequencey = lcm(node1Freq, node2Freq)
-    
+        for (yCoordNeighbour, xCoordNeighbour), combinedFrequencey in neighbors.items():
             # Determine the turn number when we reach this node
             turnWeWillBeAtThisNode = turnNumber + turnsToCurrentNode
 
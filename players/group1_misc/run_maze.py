@@ -1,5 +1,4 @@
 from timing_maze_game import TimingMazeGame
-import tkinter as tk
 
 
 class Namespace:
@@ -23,5 +22,5 @@ if __name__ == "__main__":
         }
     )
 
-    root = tk.Tk()
-    app = TimingMazeGame(args, root)
+    app = TimingMazeGame(args)
+    app.run()
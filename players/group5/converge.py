@@ -2,8 +2,8 @@ import heapq
 from typing import List, Optional
 import constants
 
+from number_theory import ExpectedWaitTable, get_expected_wait_table
 from players.group5.player_map import PlayerMapInterface
-from players.group5.door import DoorIdentifier
 
 
 DOOR_CLOSED_WEIGHT = 1e20
@@ -22,83 +22,109 @@ class ConvergeStrategy:
 		return path[0] if path else None
 
 
+# (move, dx, dy) of the neighbours, in the order they are expanded
+NEIGHBOR_STEPS = [(constants.UP, 0, -1), (constants.DOWN, 0, 1), (constants.RIGHT, 1, 0), (constants.LEFT, -1, 0)]
+
+
 def dyjkstra(current_pos : list, goal : list[list[int]], turn : int, player_map: PlayerMapInterface,  max_door_frequency) -> list:
+	"""
+	Find the cheapest path from current_pos to the nearest goal cell.
+
+	This is A* over the cells within the map's boundaries, with the costs and parents kept in flat lists indexed by
+	cell instead of a copy of the path per cell. Every move costs at least one turn, so the Manhattan distance to the
+	bounding box of the goal cells never overestimates and the search stops at the first goal cell taken off the queue.
+
+	Returns:
+	- path (list): the moves to the goal, empty if current_pos is a goal cell, None if no goal can be reached.
+	"""
 	turn = turn - 1
 
-	# Create a priority queue
-	queue = []
-	heapq.heappush(queue, (0, current_pos, turn))
+	if current_pos in goal:
+		return []
 
-	# Create a dictionary to store the cost of each position
-	costs = {tuple(current_pos): 0}
+	# Index the cells of the known map window, (x, y) is at (x - left) * height + y - up
+	left, up, right, down = player_map.get_boundaries()
+	height = down - up + 1
+	n_cells = (right - left + 1) * height
 
-	# Create a set to store visited positions
-	visited = set()
+	def in_window(x, y):
+		return left <= x <= right and up <= y <= down
 
-	# Create a dictionary to store the path to each position
-	paths = {tuple(current_pos): []}
+	goal = [cell for cell in goal if in_window(cell[0], cell[1])]
+	if not goal or not in_window(current_pos[0], current_pos[1]):
+		return None
+	goal_cells = {(x - left) * height + y - up for x, y in goal}
+	goal_left, goal_right = min(x for x, _ in goal), max(x for x, _ in goal)
+	goal_up, goal_down = min(y for _, y in goal), max(y for _, y in goal)
 
-	# Create a dictionary to store the turns for each position
-	turns = {tuple(current_pos): turn}
+	def heuristic(x, y):
+		return max(goal_left - x, 0, x - goal_right) + max(goal_up - y, 0, y - goal_down)
 
-	# While there are positions to explore
-	while queue:
-		# Get the position with the lowest cost
-		current_cost, current_pos, expected_turn  = heapq.heappop(queue)
+	start = (current_pos[0] - left) * height + current_pos[1] - up
+	costs = [float('inf')] * n_cells
+	costs[start] = 0
+	# Move that reached each cell, to walk the path back from the goal
+	parents = [None] * n_cells
+	settled = bytearray(n_cells)
 
-		# If we have reached the goal, return the path
-		if current_pos in goal:
-			return paths[tuple(current_pos)]
+	# Weights by candidate masks and expected turn, so the many walls with the same candidates (e.g. the unseen ones)
+	# cost one lookup per turn
+	expected_waits = get_expected_wait_table(max_door_frequency)
+	weights = {}
 
-		# If we have already visited this position, skip it
-		if tuple(current_pos) in visited:
+	# Queue of (estimated total cost, cost, cell, x, y, expected turn), stale entries are skipped when popped
+	queue = [(heuristic(current_pos[0], current_pos[1]), 0, start, current_pos[0], current_pos[1], turn)]
+
+	while queue:
+		_, current_cost, cell, x, y, expected_turn = heapq.heappop(queue)
+		if settled[cell]:
 			continue
 
-		# Mark the position as visited
-		visited.add(tuple(current_pos))
-
-		# Explore the neighbors
-		for move in [constants.UP, constants.DOWN, constants.RIGHT, constants.LEFT]:
-			if move == constants.LEFT:
-				neighbor = [current_pos[0] - 1, current_pos[1]]
-				door = DoorIdentifier(
-					absolute_coord=[current_pos[0], current_pos[1]],
-					door_type=constants.LEFT,
-				)
-			elif move == constants.UP:
-				neighbor = [current_pos[0], current_pos[1] - 1]
-				door = DoorIdentifier(
-					absolute_coord=[current_pos[0], current_pos[1]], 
-					door_type=constants.UP,
-				)
-			elif move == constants.RIGHT:
-				neighbor = [current_pos[0] + 1, current_pos[1]]
-				door = DoorIdentifier(
-					absolute_coord=[current_pos[0], current_pos[1]], 
-					door_type=constants.RIGHT,
-				)
-			elif move == constants.DOWN:
-				neighbor = [current_pos[0], current_pos[1] + 1]
-				door = DoorIdentifier(
-					absolute_coord=[current_pos[0], current_pos[1]], 
-					door_type=constants.DOWN,
-				)
-
-			weight, new_expected_turn = calculate_weighted_average(expected_turn, player_map.get_wall_freq_candidates(door), max_door_frequency)
+		# The first goal cell taken off the queue is the nearest one
+		if cell in goal_cells:
+			return reconstruct_path(parents, cell, height)
+
+		settled[cell] = 1
+
+		for move, dx, dy in NEIGHBOR_STEPS:
+			neighbor_x, neighbor_y = x + dx, y + dy
+			# Doors beyond the boundaries never open
+			if not in_window(neighbor_x, neighbor_y):
+				continue
+			neighbor = cell + dx * height + dy
+			if settled[neighbor]:
+				continue
+
+			door_mask, touching_door_mask = player_map.get_wall_freq_masks_by_id(player_map.get_wall_id([x, y], move))
+			key = (door_mask, touching_door_mask, expected_turn)
+			if key not in weights:
+				weights[key] = calculate_weighted_average(expected_turn, door_mask, touching_door_mask, max_door_frequency,
+														  expected_waits)
+			weight, new_expected_turn = weights[key]
 			if weight == DOOR_CLOSED_WEIGHT:
 				continue
-			
-			new_cost = current_cost + weight
 
-			# If the neighbor has not been visited or the new cost is lower, update the cost and add it to the queue
-			if tuple(neighbor) not in visited and (tuple(neighbor) not in costs or new_cost < costs[tuple(neighbor)]):
-				costs[tuple(neighbor)] = new_cost
-				paths[tuple(neighbor)] = paths[tuple(current_pos)] + [move]
-				heapq.heappush(queue, (new_cost, neighbor, new_expected_turn))
+			new_cost = current_cost + weight
+			if new_cost < costs[neighbor]:
+				costs[neighbor] = new_cost
+				parents[neighbor] = move
+				heapq.heappush(queue, (new_cost + heuristic(neighbor_x, neighbor_y), new_cost, neighbor, neighbor_x,
+									   neighbor_y, new_expected_turn))
 
 	# Could not find a path to the goal
 	return None
 
+
+def reconstruct_path(parents: list, cell: int, height: int) -> list:
+	# Follow the moves that reached each cell back to the start, which has no parent
+	steps = {move: dx * height + dy for move, dx, dy in NEIGHBOR_STEPS}
+	path = []
+	while parents[cell] is not None:
+		path.append(parents[cell])
+		cell -= steps[parents[cell]]
+	path.reverse()
+	return path
+
 # # NOTES:
 # # - see if we can hold onto the calucalted values by algorithm and modify them slightly with each turn as we learn more
 # # - the visited set should be modified to allow for backtracking if we find a better path
@@ -107,32 +133,37 @@ def dyjkstra(current_pos : list, goal : list[list[int]], turn : int, player_map:
 	# calculates the likelihood of doors being open and average wait expected
 
 
-def calculate_weighted_average(current_turn, candidates, max_door_frequency):
+def calculate_weighted_average(current_turn, door_mask, touching_door_mask, max_door_frequency,
+							   expected_waits: Optional[ExpectedWaitTable] = None):
     """
     Calculate a weighted average cost for traversing a door based on the current turn
     and the candidate turns when the door might open. Also return the expected turn.
 
+    Every pair of frequency candidates of the two doors is a candidate, opening the wall every LCM of the pair turns.
+    A pair with a door that never opens is counted as opening every max_door_frequency turns.
+
     Parameters:
     - current_turn (int): The current turn.
-    - candidates (list): A list of candidate turns when the door might open.
+    - door_mask, touching_door_mask (int): Bitmasks of the frequency candidates of the wall's two doors.
+    - max_door_frequency (int): The maximum door frequency of the game.
+    - expected_waits (ExpectedWaitTable): The table of waits to use, the shared one for max_door_frequency by default.
 
     Returns:
     - average_weight (float): The weighted average cost for passing through the door.
     - expected_turn (int): The next expected turn when the door will open.
     """
-    if all(candidate == 0 for candidate in candidates):
-        return DOOR_CLOSED_WEIGHT, current_turn + DOOR_CLOSED_WEIGHT
+    if expected_waits is None:
+        expected_waits = get_expected_wait_table(max_door_frequency)
 
-    avg_distance = 0
-	
-    for candidate in candidates:
-        if candidate == 0:
-            candidate = max_door_frequency
-		
-        distance = candidate - (current_turn % candidate)
-        avg_distance += distance
+    n_open = expected_waits.count_open_pairs(door_mask, touching_door_mask)
+    if n_open == 0:
+        return DOOR_CLOSED_WEIGHT, current_turn + DOOR_CLOSED_WEIGHT
 
+    # A candidate c is next open c - current_turn % c turns later, one more than its wait from the next turn on
+    n_candidates = bin(door_mask).count("1") * bin(touching_door_mask).count("1")
+    total_distance = n_open + expected_waits.get_wait_sum(door_mask, touching_door_mask, current_turn + 1)
+    total_distance += (n_candidates - n_open) * (max_door_frequency - current_turn % max_door_frequency)
 
-    avg_distance /= len(candidates)
+    avg_distance = total_distance / n_candidates
 
     return avg_distance, round(avg_distance) + current_turn
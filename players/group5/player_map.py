@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
 from collections import defaultdict
 import logging
-import math
 from typing import List, Optional, Set, Tuple
 
 import constants
+from number_theory import get_candidate_mask, get_mask_candidates, get_number_theory_tables
 from players.group5.door import DoorIdentifier, get_updated_frequency_candidates
 from players.group5.util import setup_file_logger
 from timing_maze_state import TimingMazeState
@@ -61,6 +61,30 @@ class PlayerMapInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_wall_id(self, coord: List[int], door_type: int) -> int:
+        """Function which returns an integer id of the wall a door is part of, the same for its touching door
+
+            Args:
+                coord (List[int]): List containing the x and y coordinates of the door's cell
+                door_type (int): Integer representing the door type
+            Returns:
+                int: Integer id of the wall
+        """
+        pass
+
+    @abstractmethod
+    def get_wall_freq_masks_by_id(self, wall_id: int) -> Tuple[int, int]:
+        """Function which returns the frequency candidates of the two doors of a wall as bitmasks
+
+            Args:
+                wall_id (int): Integer id of the wall, as returned by get_wall_id
+            Returns:
+                Tuple[int, int]: Bitmasks of the frequency candidates of the two doors (bit f for frequency f), as used
+                    by number_theory.ExpectedWaitTable
+        """
+        pass
+
     @abstractmethod
     def update_map(self, turn_num: int, percept: TimingMazeState):  # TODO: check type of maze_state
         """Function which updates the map with the given maze state
@@ -133,7 +157,11 @@ class StartPosCentricPlayerMap(PlayerMapInterface):
         self._prev_start_ref = [0,0]  # reference point used to evaluate movement of player.
 
         self._door_freqs = defaultdict(default_freq_candidates(max_door_frequency))
+        self._number_theory = get_number_theory_tables(max_door_frequency)
         self._door_status = defaultdict(int)
+
+        # Candidate bitmasks of the two doors of the walls, by wall id, dropped when update_map narrows one of their doors
+        self._wall_mask_cache = {}
         
         self.turn_num = 0
         self.cur_pos = self._START_POS
@@ -228,8 +256,11 @@ class StartPosCentricPlayerMap(PlayerMapInterface):
                 self._update_boundaries(door_type, coord)
 
             cur_freq_candidates = self._get_freq_candidates_usecase(coord, door_type)
+            n_freq_candidates = len(cur_freq_candidates)
             updated_freq_candidates = get_updated_frequency_candidates(candidates=cur_freq_candidates, turn_num=turn_num, door_state=door_state)
             self._set_freq_candidates_usecase(coord, door_type, updated_freq_candidates)
+            if len(updated_freq_candidates) != n_freq_candidates:
+                self._wall_mask_cache.pop(self.get_wall_id(coord, door_type), None)
 
             self.update_door_status(coord, door_type, door_state)
 
@@ -237,12 +268,8 @@ class StartPosCentricPlayerMap(PlayerMapInterface):
             self.set_end_pos([percept.end_x, percept.end_y])
 
     def _is_out_of_bound(self, coord: List[int]) -> bool:
-        return any([
-            coord[0] < self._boundaries[constants.LEFT], 
-            coord[0] > self._boundaries[constants.RIGHT],
-            coord[1] < self._boundaries[constants.UP],
-            coord[1] > self._boundaries[constants.DOWN],
-        ])
+        left, up, right, down = self._boundaries
+        return not (left <= coord[0] <= right and up <= coord[1] <= down)
     
     def get_valid_moves(self, turn_num: int) -> List[int]:
         if turn_num != self.turn_num:
@@ -274,26 +301,44 @@ class StartPosCentricPlayerMap(PlayerMapInterface):
                 valid_moves.append(move)
         return valid_moves
 
-    def get_wall_freq_candidates(self, door_id: DoorIdentifier) -> List[int]:
-        door_freq_candidates = self._get_freq_candidates_usecase(door_id.absolute_coord, door_id.door_type)
-
-        door_type_to_touching_door_offsets = {
-            constants.LEFT: ([-1, 0], constants.RIGHT),
-            constants.UP: ([0, -1], constants.DOWN),
-            constants.RIGHT: ([1, 0], constants.LEFT),
-            constants.DOWN: ([0, 1], constants.UP),
-        }
-        touching_door_offset, touching_door_type = door_type_to_touching_door_offsets[door_id.door_type]
-        touching_door_coord = [door_id.absolute_coord[0] + touching_door_offset[0], door_id.absolute_coord[1] + touching_door_offset[1]]
-        
-        touching_door_freq_candidates = self._get_freq_candidates_usecase(touching_door_coord, touching_door_type)
-
-        def lcm(a, b):
-            if a==0 or b==0:
-                return 0
-            return abs(a * b) // math.gcd(a, b)
+    def get_wall_id(self, coord: List[int], door_type: int) -> int:
+        # Integer id of the wall between a cell and its neighbour through door_type, the same from both sides.
+        # Coordinates may lie up to two cells beyond the global map, as the searches look one cell past the boundaries.
+        x, y = coord
+        if door_type == constants.LEFT:
+            x, door_type = x - 1, constants.RIGHT
+        elif door_type == constants.UP:
+            y, door_type = y - 1, constants.DOWN
+        return ((x + 2) * (self._GLOBAL_MAP_LEN + 4) + y + 2) * 2 + (door_type == constants.DOWN)
+
+    def _get_wall_doors(self, wall_id: int) -> Tuple[List[int], int, List[int], int]:
+        cell, is_vertical = divmod(wall_id, 2)
+        x, y = divmod(cell, self._GLOBAL_MAP_LEN + 4)
+        x, y = x - 2, y - 2
+        if is_vertical:
+            return [x, y], constants.DOWN, [x, y + 1], constants.UP
+        return [x, y], constants.RIGHT, [x + 1, y], constants.LEFT
+
+    def get_wall_freq_masks_by_id(self, wall_id: int) -> Tuple[int, int]:
+        coord, door_type, touching_door_coord, touching_door_type = self._get_wall_doors(wall_id)
+
+        # Doors beyond the boundaries never open. Boundaries differ between copies of the map, so this is not cached.
+        if self._is_out_of_bound(coord) or self._is_out_of_bound(touching_door_coord):
+            return 1, 1
+
+        wall_freq_masks = self._wall_mask_cache.get(wall_id)
+        if wall_freq_masks is None:
+            wall_freq_masks = (get_candidate_mask(self._get_freq_candidates_usecase(coord, door_type)),
+                               get_candidate_mask(self._get_freq_candidates_usecase(touching_door_coord, touching_door_type)))
+            self._wall_mask_cache[wall_id] = wall_freq_masks
+        return wall_freq_masks
 
-        return [lcm(f1, f2) for f1 in door_freq_candidates for f2 in touching_door_freq_candidates]
+    def get_wall_freq_candidates(self, door_id: DoorIdentifier) -> List[int]:
+        # LCMs of every pair of candidates of the two doors, from the same masks as the searches use
+        door_mask, touching_door_mask = self.get_wall_freq_masks_by_id(
+            self.get_wall_id(door_id.absolute_coord, door_id.door_type))
+        lcm = self._number_theory.lcm
+        return [lcm(f1, f2) for f1 in get_mask_candidates(door_mask) for f2 in get_mask_candidates(touching_door_mask)]
 
     def get_freq_candidates(self, door_id: DoorIdentifier) -> Set[int]:
         return self._get_freq_candidates_usecase(door_id.absolute_coord, door_id.door_type)
\ No newline at end of file
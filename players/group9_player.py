@@ -64,12 +64,14 @@ class Player:
             Now that the percept has updated & another step has been taken, update our 
             knowledge of door frequencies and cells
         """
-        for cell in current_percept.maze_state:
-            relative_x = int(cell[0] + self.cur_pos[0])
-            relative_y = int(cell[1] + self.cur_pos[1])
+        percept = current_percept.maze_state_array
+        relative_xs = (percept["dx"] + self.cur_pos[0]).tolist()
+        relative_ys = (percept["dy"] + self.cur_pos[1]).tolist()
+        for relative_x, relative_y, direction, state in zip(relative_xs, relative_ys, percept["door"].tolist(),
+                                                            percept["state"].tolist()):
             cell_coordinates = (relative_x, relative_y)
-            self.update_cell_state(cell_coordinates, cell[2], cell[3])
-            self.update_cell_value(cell_coordinates, cell[3])
+            self.update_cell_state(cell_coordinates, direction, state)
+            self.update_cell_value(cell_coordinates, state)
 
     def update_cell_state(self, coordinates, direction, state):
         """
@@ -0,0 +1,56 @@
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+# Trace layout: a little endian header (magic, map hash, seed, radius, max door frequency, generator version,
+# repair flag, number of turns, length of the maze path, length of the player id), the maze path and the
+# player id in UTF-8, then one int8 action per turn
+trace_extension = ".tmr"
+trace_magic = b"TMR1"
+trace_header = struct.Struct("<4s32sqHHHBIHH")
+
+
+@dataclass
+class Trace:
+    map_hash: bytes
+    seed: int
+    radius: int
+    max_door_frequency: int
+    generator_version: int
+    repair_maze: bool
+    maze: str
+    player: str
+    actions: np.ndarray
+
+
+def save_trace(path, trace):
+    maze = (trace.maze or "").encode("utf-8")
+    player = trace.player.encode("utf-8")
+    actions = np.asarray(trace.actions, dtype=np.int8)
+    with open(path, "wb") as f:
+        f.write(trace_header.pack(trace_magic, trace.map_hash, trace.seed, trace.radius, trace.max_door_frequency,
+                                  trace.generator_version, trace.repair_maze, len(actions), len(maze),
+                                  len(player)))
+        f.write(maze)
+        f.write(player)
+        f.write(actions.tobytes())
+
+
+def load_trace(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    (magic, map_hash, seed, radius, max_door_frequency, generator_version, repair_maze, n_turns, maze_length,
+     player_length) = trace_header.unpack_from(data)
+    if magic != trace_magic:
+        raise ValueError("{} is not a replay trace".format(path))
+
+    offset = trace_header.size
+    maze = data[offset:offset + maze_length].decode("utf-8")
+    offset += maze_length
+    player = data[offset:offset + player_length].decode("utf-8")
+    offset += player_length
+    actions = np.frombuffer(data, dtype=np.int8, count=n_turns, offset=offset)
+    return Trace(map_hash=map_hash, seed=seed, radius=radius, max_door_frequency=max_door_frequency,
+                 generator_version=generator_version, repair_maze=bool(repair_maze), maze=maze or None,
+                 player=player, actions=actions)
@@ -0,0 +1,182 @@
+import time
+import tkinter as tk
+
+import numpy as np
+
+import constants
+
+
+class TimingMazeGUI:
+    def __init__(self, game, root):
+        """Tkinter front end of a TimingMazeGame, only imported when the GUI is requested
+
+            Args:
+                game (TimingMazeGame): the game to display and play
+                root (tk.Tk): root window to draw in
+        """
+        self.game = game
+        self.root = root
+        self.game_speed = "normal"
+        self.scale = game.scale
+
+        self.grid_width = constants.map_dim * constants.CELL_SIZE
+        self.grid_height = constants.map_dim * constants.CELL_SIZE
+        self.canvas_width = 155 * self.scale
+        self.canvas_height = 100 * self.scale
+        self.x_offset = (self.canvas_width - self.grid_width) // 2
+        self.y_offset = (self.canvas_height - self.grid_height) // 4
+
+        self.canvas = tk.Canvas(self.root, height=self.canvas_height, width=self.canvas_width, bg="#FCF1E3")
+        self.canvas.pack()
+
+        # Replays can be moved to any turn with a slider, or one turn at a time with the arrow keys
+        self.seek_scale = None
+        if self.game.replay is not None:
+            self.seek_scale = tk.Scale(self.root, from_=0, to=len(self.game.replay.actions), orient=tk.HORIZONTAL,
+                                       length=self.canvas_width, label="Turn", command=self.seek)
+            self.seek_scale.pack()
+            self.root.bind("<Left>", lambda e: self.seek(self.game.turns - 1))
+            self.root.bind("<Right>", lambda e: self.seek(self.game.turns + 1))
+
+        self.create_items()
+        self.draw_grid()
+
+    def resume(self):
+        if self.game.game_state == "pause":
+            self.game.game_state = "resume"
+            self.game_speed = "normal"
+            self.root.after(50, self.play_game)
+
+    def pause(self):
+        if self.game.game_state != "over":
+            self.game.game_state = "pause"
+
+    def step(self):
+        if self.game.game_state != "over":
+            self.game.game_state = "pause"
+            self.root.after(100, self.play_game)
+
+    def toggle_speed(self):
+        if self.game.game_state == "resume":
+            if self.game_speed == "normal":
+                self.game_speed = "fast"
+            else:
+                self.game_speed = "normal"
+
+    def seek(self, turn):
+        turn = int(turn)
+        if turn != self.game.turns:
+            self.game.seek(turn)
+            self.draw_grid()
+
+    def play_game(self):
+        # Drive the game from the tkinter event loop, one turn per callback
+        self.game.play_turn()
+
+        render_time = time.time()
+        render_cpu = time.process_time()
+        self.draw_grid()
+        if self.seek_scale is not None:
+            self.seek_scale.set(self.game.turns)
+        if self.game.metrics is not None:
+            self.game.metrics.record_render(time.time() - render_time, time.process_time() - render_cpu)
+            if self.game.game_state == "over":
+                self.game.save_metrics()
+
+        if self.game.game_state == "resume":
+            if self.game_speed == "normal":
+                self.root.after(200, self.play_game)
+            else:
+                self.root.after(5, self.play_game)
+
+    def get_door_tag(self, frequency):
+        return "door_frequency_{}".format(frequency)
+
+    def create_items(self):
+        # Create every canvas item once, draw_grid then only updates the ones that changed.
+        # Door items are created in the order the doors used to be drawn, so they stack the same way.
+        # A door is drawn while it is closed. Doors that never open are always drawn, the others are
+        # tagged with their frequency since doors of the same frequency open and close together.
+        map_frequencies = np.asarray(self.game.map_frequencies)
+        for i in range(constants.map_dim):
+            for j in range(constants.map_dim):
+                x1, y1 = self.x_offset + i * constants.CELL_SIZE, self.y_offset + j * constants.CELL_SIZE
+                x2, y2 = x1 + constants.CELL_SIZE, y1 + constants.CELL_SIZE
+                tags = [self.get_door_tag(frequency) for frequency in map_frequencies[i][j].tolist()]
+
+                self.canvas.create_line(x1, y1+0.5, x2, y1+0.5, fill="blue", width=0.5, tags=tags[constants.UP])
+                self.canvas.create_line(x2-0.5, y1, x2-0.5, y2, fill="blue", width=0.5, tags=tags[constants.RIGHT])
+                self.canvas.create_line(x1, y2-0.5, x2, y2-0.5, fill="red", width=0.5, tags=tags[constants.DOWN])
+                self.canvas.create_line(x1+0.5, y1, x1+0.5, y2, fill="red", width=0.5, tags=tags[constants.LEFT])
+
+        # Whether the doors of each frequency are currently drawn as open, none are before the first draw_grid
+        self.drawn_open = {frequency: False for frequency in np.unique(map_frequencies).tolist() if frequency > 0}
+
+        # Mark the start, cur, and end positions
+        self.mark_position(self.game.start_pos, "green")
+        self.cur_pos_marker, self.radius_circle = self.mark_position(self.game.cur_pos, "orange", True)
+        self.mark_position(self.game.end_pos, "red")
+        self.create_buttons()
+        self.turns_text = self.canvas.create_text(650, 20, font=("Arial", 14), fill="black", activefill="gray",
+                                                  tags="turns text")
+        self.canvas.create_text(750, 20, text="Start Pos: {}".format(self.game.start_pos), font=("Arial", 14),
+                                fill="black", activefill="gray", tags="turns text")
+        self.canvas.create_text(900, 20, text="End Pos: {}".format(self.game.end_pos), font=("Arial", 14),
+                                fill="black", activefill="gray", tags="turns text")
+        self.cur_pos_text = self.canvas.create_text(1050, 20, font=("Arial", 14), fill="black", activefill="gray",
+                                                    tags="turns text")
+
+    def draw_grid(self):
+        # Before the first turn is played, show the doors as they will be on turn 1
+        turn = max(self.game.turns, 1)
+
+        # Only reconfigure the doors of the frequencies that opened or closed since the last drawing
+        for frequency, drawn_open in self.drawn_open.items():
+            is_open = turn % frequency == 0
+            if is_open != drawn_open:
+                self.canvas.itemconfigure(self.get_door_tag(frequency), state="hidden" if is_open else "normal")
+                self.drawn_open[frequency] = is_open
+
+        self.canvas.coords(self.cur_pos_marker, *self.get_marker_coords(self.game.cur_pos))
+        self.canvas.coords(self.radius_circle, *self.get_circle_coords(self.game.cur_pos))
+        self.canvas.itemconfigure(self.turns_text, text="Turns: {}".format(self.game.turns))
+        self.canvas.itemconfigure(self.cur_pos_text, text="Cur Pos: {}".format(self.game.cur_pos))
+
+    def create_buttons(self):
+        # Create text-based "Pause" button on the canvas
+        self.pause_btn = self.canvas.create_text(250, 20, text="Pause", font=("Arial", 14), fill="black",
+                                                 activefill="gray", tags="pause_button")
+        self.canvas.tag_bind("pause_button", "<Button-1>", lambda e: self.pause())
+
+        # Create a text-based "Reset" button on the canvas
+        self.resume_btn = self.canvas.create_text(350, 20, text="Start/Resume", font=("Arial", 14), fill="black",
+                                                  activefill="gray", tags="resume_button")
+        self.canvas.tag_bind("resume_button", "<Button-1>", lambda e: self.resume())
+
+        self.resume_btn = self.canvas.create_text(450, 20, text="1X/4X", font=("Arial", 14), fill="black",
+                                                  activefill="gray", tags="speed_button")
+        self.canvas.tag_bind("speed_button", "<Button-1>", lambda e: self.toggle_speed())
+
+        self.step_btn = self.canvas.create_text(550, 20, text="Step", font=("Arial", 14), fill="black",
+                                                  activefill="gray", tags="step_button")
+        self.canvas.tag_bind("step_button", "<Button-1>", lambda e: self.step())
+
+    def get_marker_coords(self, pos):
+        x, y = pos
+        x1, y1 = self.x_offset + x * constants.CELL_SIZE + constants.CELL_SIZE / 5, self.y_offset + y * constants.CELL_SIZE + constants.CELL_SIZE / 5
+        x2, y2 = x1 + constants.CELL_SIZE * 2/3, y1 + constants.CELL_SIZE * 2/3
+        return x1, y1, x2, y2
+
+    def get_circle_coords(self, pos):
+        x, y = pos
+        cx, cy = self.x_offset + x * constants.CELL_SIZE + constants.CELL_SIZE/2, self.y_offset + y * constants.CELL_SIZE + constants.CELL_SIZE/2
+        r = self.game.radius*constants.CELL_SIZE
+        return cx - r, cy - r, cx + r, cy + r
+
+    def mark_position(self, pos, color, withCircle = False):
+        marker = self.canvas.create_rectangle(*self.get_marker_coords(pos), fill=color)
+
+        if withCircle:
+            circle = self.canvas.create_oval(*self.get_circle_coords(pos), fill="", outline="blue", width=1)
+            return marker, circle
+        return marker
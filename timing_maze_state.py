@@ -1,19 +1,77 @@
+import numpy as np
+
+# One visible door: offset of its cell from the drone, door type and door state
+percept_dtype = np.dtype([("dx", np.int32), ("dy", np.int32), ("door", np.int8), ("state", np.int8)])
+
+
 class TimingMazeState:
     def __init__(self, maze_state, is_end_visible, end_x, end_y, start_x, start_y):
         """
             Args:
-                maze_state (List[List[int]]): 2D list of integers representing the maze state
+                maze_state (List[Tuple[int, int, int, int]] or np.ndarray): visible doors as (dx, dy, door_type,
+                    door_state) tuples, or as a structured array of percept_dtype
                 is_end_visible (bool): Boolean representing if the end is visible
                 end_x (int): x-coordinate of the end cell
                 end_y (int): y-coordinate of the end cell
         """
-        self.maze_state = maze_state
+        if isinstance(maze_state, np.ndarray):
+            self._maze_state = None
+            self._maze_state_array = maze_state
+        else:
+            self._maze_state = maze_state
+            self._maze_state_array = None
+        self._door_window = None
+        self.window_offset = 0
+
         self.start_x = start_x
         self.start_y = start_y
         self.is_end_visible = is_end_visible
         if is_end_visible:
             self.end_x = end_x
             self.end_y = end_y
-    
+
+    @property
+    def maze_state(self):
+        # List of (dx, dy, door_type, door_state) tuples, only built for players that use it
+        if self._maze_state is None:
+            percept = self._maze_state_array
+            self._maze_state = list(zip(percept["dx"].tolist(), percept["dy"].tolist(),
+                                        percept["door"].tolist(), percept["state"].tolist()))
+        return self._maze_state
+
+    @property
+    def maze_state_array(self):
+        # Structured array of percept_dtype with fields dx, dy, door and state
+        if self._maze_state_array is None:
+            doors = np.array(self._maze_state, dtype=int).reshape(-1, 4)
+            self._maze_state_array = np.empty(len(doors), dtype=percept_dtype)
+            for i, field in enumerate(percept_dtype.names):
+                self._maze_state_array[field] = doors[:, i]
+        return self._maze_state_array
+
+    @property
+    def door_window(self):
+        """Dense (2 * window_offset + 1, 2 * window_offset + 1, 4) array of door states
+
+            door_window[dx + window_offset][dy + window_offset][door_type] is the state of the door, or 0 if the
+            door is not visible.
+        """
+        if self._door_window is None:
+            percept = self.maze_state_array
+            if len(percept):
+                self.window_offset = int(max(np.abs(percept["dx"]).max(), np.abs(percept["dy"]).max()))
+            size = 2 * self.window_offset + 1
+            self._door_window = np.zeros((size, size, 4), dtype=np.int8)
+            self._door_window[percept["dx"] + self.window_offset, percept["dy"] + self.window_offset,
+                              percept["door"]] = percept["state"]
+        return self._door_window
+
+    def get_door_state(self, dx, dy, door_type):
+        # State of a door relative to the drone, 0 if it is not visible
+        door_window = self.door_window
+        if abs(dx) > self.window_offset or abs(dy) > self.window_offset:
+            return 0
+        return int(door_window[dx + self.window_offset][dy + self.window_offset][door_type])
+
     def __str__(self):
-        return f"Is End Visibile: {self.is_end_visible}\nStart: [{self.start_x},{self.start_y}]\n"
\ No newline at end of file
+        return f"Is End Visibile: {self.is_end_visible}\nStart: [{self.start_x},{self.start_y}]\n"
@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import glob
+import itertools
+import os
+import signal
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+import constants
+import player_registry
+from replay import trace_extension
+
+# Columns identifying a game, used to skip games already in the results file when resuming
+task_columns = ["player", "maze", "seed", "radius", "max_door_frequency"]
+
+# Number of times a game is retried after its worker process died before it is recorded as crashed
+max_crash_retries = 1
+
+
+class TaskTimeout(BaseException):
+    # Not an Exception, so that the engine and the players catching Exception cannot swallow it
+    pass
+
+
+def task_timeout_handler(signum, frame):
+    raise TaskTimeout
+
+
+def run_game_task(task, task_timeout=None, max_turns=None, generator_version=constants.generator_version,
+                  metrics_dir=None, record_dir=None):
+    """Play one headless game in a worker process
+
+        Args:
+            task (dict): player, maze (None for a random maze), seed, radius and max_door_frequency of the game
+            task_timeout (int): seconds after which the game is stopped, None to disable
+            max_turns (int): turns after which the game is stopped, None to disable
+            generator_version (int): version of the random maze generator
+            metrics_dir (str): directory to save the per-turn metrics of the game to, None to disable
+            record_dir (str): directory to save the replay trace of the game to, None to disable
+        Returns:
+            dict: task, status and results of the game
+    """
+    # The pool already runs a game per CPU, so players must not start search processes of their own
+    os.environ[constants.serial_players_env] = "1"
+
+    # Imported in the worker so the parent process never loads the engine and the players
+    from timing_maze_game import TimingMazeGame
+    from oracle import get_oracle_turns
+
+    args = argparse.Namespace(max_door_frequency=task["max_door_frequency"], radius=task["radius"],
+                              seed=task["seed"], maze=task["maze"], scale=9, no_gui=True, log_path=None,
+                              disable_logging=True, disable_timeout=True, player=task["player"],
+                              generator_version=generator_version, repair_maze=False,
+                              metrics_path=get_game_path(metrics_dir, task, ".csv") if metrics_dir else None,
+                              record_path=get_game_path(record_dir, task, trace_extension) if record_dir else None)
+    row = dict(task, status="ok", turns=None, valid_moves=None, goal_reached=None, player_timeout=None,
+               wall_time=None, cpu_time=None, player_time=None, error=None, oracle_turns=None,
+               competitive_ratio=None)
+
+    wall_start = time.time()
+    cpu_start = time.process_time()
+    if task_timeout:
+        signal.signal(signal.SIGALRM, task_timeout_handler)
+        signal.alarm(task_timeout)
+    game = None
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            game = TimingMazeGame(args)
+            if max_turns:
+                game.max_turns = max_turns
+            game.run()
+    except TaskTimeout:
+        row["status"] = "timeout"
+    except Exception:
+        row["status"] = "error"
+        row["error"] = traceback.format_exc(limit=-1).strip().splitlines()[-1]
+    finally:
+        if task_timeout:
+            signal.alarm(0)
+
+    # Also save the metrics and traces of games that timed out or failed, those are the ones worth looking at
+    if game is not None and game.game_state != "over":
+        game.save_metrics()
+        game.save_trace()
+
+    row["wall_time"] = time.time() - wall_start
+    row["cpu_time"] = time.process_time() - cpu_start
+    if game is not None and game.player_name is not None:
+        result = game.get_result()
+        row.update(turns=result.turns, valid_moves=result.valid_moves, goal_reached=result.goal_reached,
+                   player_timeout=result.player_timeout, player_time=result.player_time_taken)
+
+    # Competitive ratio against the minimum number of turns on the map, for the games that reached the end
+    if game is not None and game.start_pos is not None:
+        row["oracle_turns"] = get_oracle_turns(game.map_frequencies, game.start_pos, game.end_pos)
+        if row["goal_reached"] and row["oracle_turns"]:
+            row["competitive_ratio"] = row["turns"] / row["oracle_turns"]
+    return row
+
+
+def build_tasks(players, mazes, seeds, radii, max_door_frequencies):
+    return [dict(player=player, maze=maze, seed=seed, radius=radius, max_door_frequency=max_door_frequency)
+            for player, maze, seed, radius, max_door_frequency
+            in itertools.product(players, mazes, seeds, radii, max_door_frequencies)]
+
+
+def get_game_path(directory, task, extension):
+    # File of a game in directory, named after its task
+    os.makedirs(directory, exist_ok=True)
+    maze = os.path.splitext(os.path.basename(task["maze"]))[0] if task["maze"] else "random"
+    return os.path.join(directory, "{}_{}_s{}_r{}_m{}{}".format(task["player"], maze, task["seed"], task["radius"],
+                                                                task["max_door_frequency"], extension))
+
+
+def task_key(task):
+    return tuple(task[column] for column in task_columns)
+
+
+def load_finished_tasks(output_path):
+    if not os.path.isfile(output_path):
+        return set()
+    finished = pd.read_csv(output_path, dtype={"player": str}, keep_default_na=False)
+    finished["maze"] = finished["maze"].where(finished["maze"] != "", None)
+    return set(finished[task_columns].itertuples(index=False, name=None))
+
+
+def append_result(output_path, row):
+    # Results are written as soon as a game finishes so an interrupted tournament can be resumed
+    pd.DataFrame([row]).to_csv(output_path, mode="a", index=False, header=not os.path.isfile(output_path))
+
+
+def run_isolated_game_task(task, game_args):
+    # Play a game in a worker process of its own, retrying it when that process dies. None if it kept dying.
+    for _ in range(max_crash_retries + 1):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return executor.submit(run_game_task, task, *game_args).result()
+            except BrokenProcessPool:
+                continue
+    return None
+
+
+def run_tournament(tasks, output_path, workers=None, task_timeout=None, max_turns=None,
+                   generator_version=constants.generator_version, metrics_dir=None, record_dir=None):
+    """Play all games not already in output_path over a pool of worker processes
+
+        Returns:
+            pd.DataFrame: results of every game in output_path
+    """
+    finished = load_finished_tasks(output_path)
+    pending = [task for task in tasks if task_key(task) not in finished]
+    print("{} of {} games left to play".format(len(pending), len(tasks)))
+
+    done = 0
+    game_args = (task_timeout, max_turns, generator_version, metrics_dir, record_dir)
+
+    def record(row):
+        nonlocal done
+        append_result(output_path, row)
+        done += 1
+        print("[{}/{}] player {} maze {} seed {}: {} in {} turns".format(
+            done, len(tasks) - len(finished), row["player"], row["maze"], row["seed"], row["status"],
+            row.get("turns")))
+
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_game_task, task, *game_args): task for task in pending}
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except BrokenProcessPool:
+                broken.append(futures[future])
+                continue
+            record(row)
+
+    # A worker died, so every game still running or queued in the pool failed with it, not only the one that
+    # killed it. Replay each of them in a worker process of its own, still up to `workers` at a time, so only a game
+    # whose own worker dies counts as a crash, and record the ones that keep crashing as crashed.
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(run_isolated_game_task, task, game_args): task for task in broken}
+        for future in as_completed(futures):
+            row = future.result()
+            record(row if row is not None else dict(futures[future], status="crashed"))
+
+    return pd.read_csv(output_path, dtype={"player": str})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", "-p", nargs="+", default=player_registry.get_player_ids(),
+                        choices=player_registry.get_player_ids(), help="Players to run")
+    parser.add_argument("--mazes", "-mz", nargs="+", default=[os.path.join("maps", "**", "*.json")],
+                        help="Map files or glob patterns, 'random' for a maze generated from the seed")
+    parser.add_argument("--seeds", "-s", nargs="+", type=int, default=[2], help="Seeds used by random number generator")
+    parser.add_argument("--radius", "-r", nargs="+", type=int, default=[15], help="Radii of the drone")
+    parser.add_argument("--max_door_frequency", "-m", nargs="+", type=int, default=[5],
+                        help="Maximum door frequencies")
+    parser.add_argument("--generator_version", "-gv", type=int, default=constants.generator_version,
+                        help="Version of the random maze generator")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--task_timeout", type=int, default=constants.timeout + 60,
+                        help="Seconds after which a single game is stopped, 0 to disable")
+    parser.add_argument("--max_turns", "-T", type=int, default=None, help="Turns after which a game is stopped")
+    parser.add_argument("--output", "-o", default="tournament_results.csv",
+                        help="CSV file the results are appended to, games already in it are skipped")
+    parser.add_argument("--metrics_dir", help="Directory to save the per-turn metrics of every game to")
+    parser.add_argument("--record_dir", help="Directory to save the replay trace of every game to")
+    args = parser.parse_args()
+
+    mazes = []
+    for pattern in args.mazes:
+        if pattern == "random":
+            mazes.append(None)
+        else:
+            mazes += sorted(glob.glob(pattern, recursive=True))
+
+    tasks = build_tasks(args.players, mazes, args.seeds, args.radius, args.max_door_frequency)
+    start_time = time.time()
+    results = run_tournament(tasks, args.output, args.workers, args.task_timeout, args.max_turns,
+                             args.generator_version, args.metrics_dir, args.record_dir)
+    print("\nPlayed {} games in {:.3f}s\n".format(len(results), time.time() - start_time))
+    print(results.groupby(["player", "status"]).size().to_string())
+    print("\nCompetitive ratio (turns / oracle turns) of the games that reached the end\n")
+    print(results.groupby("player")["competitive_ratio"].describe()[["count", "mean", "min", "max"]].to_string())
@@ -2,6 +2,8 @@ import logging
 import unicodedata
 import re
 
+import number_theory
+
 
 def slugify(value, allow_unicode=False):
     """
@@ -62,8 +64,5 @@ def count_iterable(i):
     return sum(1 for e in i)
 
 def get_divisors(n):
-        divisors = set([n])
-        for i in range(1, int((n ** 0.5)) + 1):
-            if n % i == 0:
-                divisors.add(i)
-        return divisors
\ No newline at end of file
+    # Set of the divisors of n, looked up in the table shared by all players
+    return set(number_theory.get_divisors(n))